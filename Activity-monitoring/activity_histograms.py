@@ -0,0 +1,218 @@
+"""
+Rolling per-wallet activity histograms
+Time-bucketed counters per (chain, wallet) kept in fixed-size rings so
+inactivity questions ("tx count in the last 7d", "longest gap") are answered
+from the buckets instead of rescanning stored transactions.
+"""
+
+import threading
+import time
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# (bucket width in seconds, number of buckets)
+DEFAULT_RINGS = (
+    (MINUTE, 24 * 60),   # last day at minute resolution
+    (HOUR, 30 * 24),     # last 30 days at hour resolution
+    (DAY, 400),          # last ~13 months at day resolution
+)
+
+
+class BucketRing:
+    """Fixed-memory ring of counters, one per time bucket"""
+
+    def __init__(self, width, size):
+        self.width = width
+        self.size = size
+        self.counts = [0] * size
+        self.bucket_ids = [-1] * size
+
+    @property
+    def span(self):
+        return self.width * self.size
+
+    def add(self, ts, amount=1):
+        bucket_id = int(ts // self.width)
+        slot = bucket_id % self.size
+        if self.bucket_ids[slot] != bucket_id:
+            if self.bucket_ids[slot] > bucket_id:
+                return  # older than anything the ring still covers
+            self.bucket_ids[slot] = bucket_id
+            self.counts[slot] = 0
+        self.counts[slot] += amount
+
+    def count(self, bucket_id):
+        slot = bucket_id % self.size
+        return self.counts[slot] if self.bucket_ids[slot] == bucket_id else 0
+
+    def buckets(self, start_ts, end_ts):
+        """Yield (bucket_id, count) for every bucket overlapping [start_ts, end_ts]"""
+        first = max(int(start_ts // self.width), int(end_ts // self.width) - self.size + 1)
+        for bucket_id in range(first, int(end_ts // self.width) + 1):
+            yield bucket_id, self.count(bucket_id)
+
+    def to_dict(self):
+        return {"width": self.width, "size": self.size, "counts": self.counts, "bucket_ids": self.bucket_ids}
+
+    @classmethod
+    def from_dict(cls, data):
+        ring = cls(data["width"], data["size"])
+        ring.counts = list(data["counts"])
+        ring.bucket_ids = list(data["bucket_ids"])
+        return ring
+
+
+class WalletHistogram:
+    """
+    Activity counters for one wallet on one chain
+
+    The longest gap between recorded transactions is kept exactly by
+    tracking the `max_gaps` largest gaps with their bounds: a record that
+    arrives out of order (e.g. under priority matching) splits the tracked
+    gap it falls into. gap_floor is the largest gap no longer tracked, so
+    longest_gap only becomes an upper bound once that many of the largest
+    gaps have been split.
+    """
+
+    def __init__(self, rings=DEFAULT_RINGS, max_gaps=16):
+        self.rings = [BucketRing(width, size) for width, size in rings]
+        self.max_gaps = max_gaps
+        self.total = 0
+        self.first_seen = None
+        self.last_seen = None
+        self.gaps = []  # [start, end] of the largest gaps, largest first
+        self.gap_floor = 0.0
+
+    @property
+    def longest_gap(self):
+        return max(self.gaps[0][1] - self.gaps[0][0] if self.gaps else 0.0, self.gap_floor)
+
+    def _add_gap(self, start, end):
+        if end - start <= self.gap_floor:
+            return
+        self.gaps.append([start, end])
+        self.gaps.sort(key=lambda gap: gap[0] - gap[1])
+        if len(self.gaps) > self.max_gaps:
+            start, end = self.gaps.pop()
+            self.gap_floor = max(self.gap_floor, end - start)
+
+    def _split_gap(self, ts):
+        for gap in self.gaps:
+            start, end = gap
+            if start < ts < end:
+                self.gaps.remove(gap)
+                self._add_gap(start, ts)
+                self._add_gap(ts, end)
+                return
+
+    def record(self, ts):
+        """Constant-time update (bounded by max_gaps) for one matched receipt"""
+        for ring in self.rings:
+            ring.add(ts)
+        self.total += 1
+        if self.last_seen is None:
+            self.first_seen = self.last_seen = ts
+        elif ts > self.last_seen:
+            self._add_gap(self.last_seen, ts)
+            self.last_seen = ts
+        elif ts < self.first_seen:
+            self._add_gap(ts, self.first_seen)
+            self.first_seen = ts
+        else:
+            self._split_gap(ts)
+
+    def _ring_for(self, window):
+        for ring in self.rings:
+            if ring.span >= window:
+                return ring
+        return self.rings[-1]
+
+    def count(self, window, now=None):
+        """Number of matched transactions in the last `window` seconds"""
+        now = time.time() if now is None else now
+        ring = self._ring_for(window)
+        return sum(count for _, count in ring.buckets(now - window, now))
+
+    def gap(self, window=None, now=None):
+        """
+        Longest stretch without activity, in seconds
+        Without a window this is exact over all recorded history (including the
+        still-open gap since the last transaction). With a window it is
+        measured from the buckets, so it is accurate to one bucket width.
+        """
+        now = time.time() if now is None else now
+        if window is None:
+            if self.last_seen is None:
+                return None
+            return max(self.longest_gap, now - self.last_seen)
+
+        ring = self._ring_for(window)
+        longest = run = 0
+        for _, count in ring.buckets(now - window, now):
+            run = 0 if count else run + 1
+            longest = max(longest, run)
+        return min(longest * ring.width, window)
+
+    def to_dict(self):
+        return {
+            "rings": [ring.to_dict() for ring in self.rings],
+            "total": self.total,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "gaps": self.gaps,
+            "gap_floor": self.gap_floor
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(rings=())
+        histogram.rings = [BucketRing.from_dict(ring) for ring in data["rings"]]
+        histogram.total = data["total"]
+        histogram.first_seen = data["first_seen"]
+        histogram.last_seen = data["last_seen"]
+        histogram.gaps = [list(gap) for gap in data.get("gaps", [])]
+        # Snapshots from before gap tracking only have the length
+        histogram.gap_floor = data.get("gap_floor", data.get("longest_gap", 0.0))
+        return histogram
+
+
+class ActivityHistograms:
+    """Thread-safe registry of WalletHistogram per (chain, wallet)"""
+
+    def __init__(self, rings=DEFAULT_RINGS):
+        self.rings = rings
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def _get(self, chain, wallet, create=False):
+        key = (chain, wallet.lower())
+        histogram = self._histograms.get(key)
+        if histogram is None and create:
+            histogram = self._histograms[key] = WalletHistogram(self.rings)
+        return histogram
+
+    def record(self, chain, wallet, ts):
+        with self._lock:
+            self._get(chain, wallet, create=True).record(ts)
+
+    def count(self, chain, wallet, window, now=None):
+        with self._lock:
+            histogram = self._get(chain, wallet)
+            return histogram.count(window, now) if histogram else 0
+
+    def gap(self, chain, wallet, window=None, now=None):
+        with self._lock:
+            histogram = self._get(chain, wallet)
+            return histogram.gap(window, now) if histogram else None
+
+    def snapshot(self, chain, wallet):
+        """Serializable state of one wallet's histogram, or None"""
+        with self._lock:
+            histogram = self._get(chain, wallet)
+            return histogram.to_dict() if histogram else None
+
+    def restore(self, chain, wallet, data):
+        with self._lock:
+            self._histograms[(chain, wallet.lower())] = WalletHistogram.from_dict(data)
@@ -0,0 +1,151 @@
+"""
+Activity stream fan-out for dashboards
+Matched wallet activity is serialized once per event and pushed to every
+interested Server-Sent Events / WebSocket subscriber. Each subscriber has a
+bounded buffer; a client that falls behind is evicted instead of slowing down
+the others or growing memory.
+"""
+
+import asyncio
+import json
+import threading
+
+
+class Subscriber:
+    """One connected dashboard client"""
+
+    def __init__(self, chains=None, wallets=None, buffer_size=256):
+        self.chains = set(chains) if chains else None
+        self.wallets = {wallet.lower() for wallet in wallets} if wallets else None
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+        self.evicted = False
+
+    def wants(self, chain):
+        return self.chains is None or chain in self.chains
+
+
+class ActivityBroadcaster:
+    """
+    Thread-safe publisher, asyncio-side fan-out
+
+    publish() may be called from any thread (the agents run their own event
+    loops); delivery happens on the web server's loop bound with bind_loop().
+    """
+
+    def __init__(self, buffer_size=256):
+        self.buffer_size = buffer_size
+        self._loop = None
+        self._by_wallet = {}
+        self._any_wallet = set()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.evictions = 0
+
+    def bind_loop(self, loop):
+        self._loop = loop
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._any_wallet.union(*self._by_wallet.values()))
+
+    def subscribe(self, chains=None, wallets=None):
+        subscriber = Subscriber(chains, wallets, self.buffer_size)
+        with self._lock:
+            if subscriber.wallets is None:
+                self._any_wallet.add(subscriber)
+            else:
+                for wallet in subscriber.wallets:
+                    self._by_wallet.setdefault(wallet, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._any_wallet.discard(subscriber)
+            for wallet in subscriber.wallets or ():
+                subs = self._by_wallet.get(wallet)
+                if subs is not None:
+                    subs.discard(subscriber)
+                    if not subs:
+                        del self._by_wallet[wallet]
+
+    def publish(self, event):
+        """
+        Publish a matched-activity event
+        event must contain "chain" and "wallet"; it is serialized exactly once
+        """
+        if self._loop is None:
+            return
+        data = json.dumps(event, separators=(",", ":"))
+        frame = ("event: activity\ndata: " + data + "\n\n").encode("utf-8")
+        payload = (data, frame)
+        try:
+            if _running_loop() is self._loop:
+                self._fan_out(event["chain"], event["wallet"].lower(), payload)
+            else:
+                self._loop.call_soon_threadsafe(self._fan_out, event["chain"], event["wallet"].lower(), payload)
+        except RuntimeError:
+            pass  # server loop already closed
+
+    def _fan_out(self, chain, wallet, payload):
+        self.published += 1
+        with self._lock:
+            targets = list(self._any_wallet) + list(self._by_wallet.get(wallet, ()))
+        for subscriber in targets:
+            if subscriber.evicted or not subscriber.wants(chain):
+                continue
+            try:
+                subscriber.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                self._evict(subscriber)
+
+    def _evict(self, subscriber):
+        """Drop a slow consumer; its stream ends after the eviction notice"""
+        self.evictions += 1
+        subscriber.evicted = True
+        self.unsubscribe(subscriber)
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+
+    async def sse_frames(self, subscriber, heartbeat=15):
+        """Async iterator of SSE frames for one subscriber"""
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if payload is None:
+                    yield b"event: evicted\ndata: {}\n\n"
+                    return
+                yield payload[1]
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def websocket_messages(self, subscriber):
+        """Async iterator of WebSocket text messages for one subscriber"""
+        try:
+            while True:
+                payload = await subscriber.queue.get()
+                if payload is None:
+                    return
+                yield payload[0]
+        finally:
+            self.unsubscribe(subscriber)
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def parse_filter(value):
+    """Comma-separated query parameter to a list, or None for no filter"""
+    if not value:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
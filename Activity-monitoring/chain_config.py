@@ -0,0 +1,36 @@
+"""
+Shared chain configuration for the multi-chain monitor
+Used by the combined webhook server, its agents and the offline tools
+"""
+
+MONITORED_WALLET = "0xdB630944101765cfb1f6836AE7579Eee1cdBbCBC"
+
+# Configuration for all chains
+CHAIN_CONFIG = {
+    "sepolia": {
+        "file": "sepolia_transactions.json",
+        "wallet": MONITORED_WALLET,
+        "port": 8001,
+        "confirmations": 2,
+        "caip2": "eip155:11155111",
+        "finality_blocks": 128
+    },
+    "bnb": {
+        "file": "bnb_transactions.json",
+        "wallet": MONITORED_WALLET,
+        "port": 8002,
+        "confirmations": 3,
+        "caip2": "eip155:56",
+        "finality_blocks": 1024
+    },
+    "optimism": {
+        "file": "optimism_transactions.json",
+        "wallet": MONITORED_WALLET,
+        "port": 8003,
+        "confirmations": 2,
+        "caip2": "eip155:10",
+        "finality_blocks": 1800
+    }
+}
+
+DEFAULT_CHAIN = "sepolia"
@@ -6,21 +6,38 @@ Monitors transactions for an Optimism Sepolia wallet using QuickNode webhook dat
 from uagents import Agent, Context
 import json
 import os
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from coalescing_storage import CoalescingStorage
+
 agent = Agent(name="optimism_wallet_monitor", seed="optimism_wallet_monitor_seed", port=8003)
 
 # Replace with your monitored Optimism wallet
 MONITORED_WALLET = "0xdB630944101765cfb1f6836AE7579Eee1cdBbCBC"
 TRANSACTIONS_FILE = "optimism_transactions.json"
 
+# Monitor state, written once per tick instead of on every ctx.storage.set()
+state = CoalescingStorage("optimism_wallet_monitor_state.json")
+
+@agent.on_event("startup")
+async def load_state(ctx: Context):
+    state.migrate_from(ctx.storage, ("processed_tx", "last_active", "activity_count"))
+
+@agent.on_event("shutdown")
+async def save_state(ctx: Context):
+    state.flush()
+
 @agent.on_interval(period=5)  # check every 5 seconds
 async def check_wallet_activity(ctx: Context):
     """
     Check if monitored Optimism wallet has any recent transactions
     """
-    # Get processed transaction hashes from agent storage
-    processed_tx = ctx.storage.get("processed_tx") or []
+    # Get processed transaction hashes (only the last 200 are kept)
+    processed_tx = state.recent_set("processed_tx", maxlen=200)
+    activity_count = state.counter("activity_count")
     
     # Read transactions from file
     tx_list = []
@@ -67,25 +84,22 @@ async def check_wallet_activity(ctx: Context):
             ctx.logger.info(f"   Hash: {tx_hash[:20]}...")
             
             # Store activity info
-            ctx.storage.set("last_active", timestamp)
-            activity_count = ctx.storage.get("activity_count") or 0
-            ctx.storage.set("activity_count", activity_count + 1)
+            state.set("last_active", timestamp)
+            activity_count.increment()
         
         # Mark transaction as processed
-        processed_tx.append(tx_hash)
+        processed_tx.add(tx_hash)
     
-    # Store processed transaction hashes (keep only last 200)
-    if len(processed_tx) > 200:
-        processed_tx = processed_tx[-200:]
-    ctx.storage.set("processed_tx", processed_tx)
+    # Persist this tick's changes with a single atomic write
+    state.flush()
 
 @agent.on_interval(period=30)  # status update every 30 seconds  
 async def status_update(ctx: Context):
     """
     Print status information
     """
-    last_active = ctx.storage.get("last_active")
-    activity_count = ctx.storage.get("activity_count") or 0
+    last_active = state.get("last_active")
+    activity_count = state.counter("activity_count").value
     
     if last_active:
         ctx.logger.info(f"📈 Monitoring Optimism wallet: {MONITORED_WALLET}")
@@ -74,4 +74,4 @@ async def webhook_receiver(request: Request):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=3003)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("WEBHOOK_PORT", 3003)))
\ No newline at end of file
@@ -1,34 +1,19 @@
 """
 Startup script to run both the webhook server and the monitoring agent
+The agent is started once the webhook server accepts connections, and either
+process is restarted if it dies.
 """
 
-import subprocess
-import sys
-import time
 import os
-from threading import Thread
+import sys
 
-def run_webhook_server():
-    """Run the FastAPI webhook server"""
-    print("🌐 Starting webhook server on port 3001...")
-    subprocess.run([sys.executable, "webhook_server.py"])
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
 
-def run_agent():
-    """Run the monitoring agent"""
-    print(" Starting monitoring agent...")
-    time.sleep(2)
-    subprocess.run([sys.executable, "agent.py"])
+from supervisor import Supervisor, chain_specs
 
 if __name__ == "__main__":
     print(" Starting LifeLink Wallet Activity Monitor...")
     print(f" Working directory: {os.getcwd()}")
-    
-    # Start webhook server in background thread
-    webhook_thread = Thread(target=run_webhook_server, daemon=True)
-    webhook_thread.start()
 
-    try:
-        run_agent()
-    except KeyboardInterrupt:
-        print("\n⏹  Shutting down monitoring system...")
-        sys.exit(0)
\ No newline at end of file
+    # Webhook server on port 3001, then the agent once the server is ready
+    Supervisor(chain_specs("sepolia")).run()
@@ -72,4 +72,4 @@ async def webhook_receiver(request: Request):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=3001)
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("WEBHOOK_PORT", 3001)))
@@ -0,0 +1,216 @@
+"""
+Write-coalescing state for the chain monitors
+uAgents' ctx.storage rewrites its whole JSON file on every set(), so a busy
+wallet costs several full-file rewrites per tick. CoalescingStorage keeps the
+monitor state in memory, records mutations as a dirty flag and persists
+everything with one atomic write (temp file + fsync + rename) per flush.
+
+Crash semantics: the file on disk is always a complete snapshot from the
+last flush. A crash loses at most the mutations made since then, i.e. one
+flush interval. Because processed hashes and counters are flushed together,
+the reloaded state is consistent and the lost transactions are simply
+processed again on the next tick.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class Counter:
+    """Integer counter stored under one key"""
+
+    def __init__(self, storage, name):
+        self._storage = storage
+        self.name = name
+
+    @property
+    def value(self):
+        return self._storage.get(self.name, 0)
+
+    def increment(self, amount=1):
+        value = self.value + amount
+        self._storage.set(self.name, value)
+        return value
+
+
+class MapView:
+    """Dictionary stored under one key"""
+
+    def __init__(self, storage, name):
+        self._storage = storage
+        self.name = name
+        self._data = storage.get(name) or {}
+        storage._data[name] = self._data
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def set(self, key, value):
+        with self._storage._lock:
+            self._data[key] = value
+            self._storage._dirty = True
+
+    def items(self):
+        return list(self._data.items())
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def to_json(self):
+        return self._data
+
+
+class RecentSet:
+    """
+    Insertion-ordered set keeping only the newest maxlen items
+    Replaces the "list of processed hashes, keep the last 200" pattern with
+    O(1) membership checks
+    """
+
+    def __init__(self, storage, name, maxlen):
+        self._storage = storage
+        self.name = name
+        self.maxlen = maxlen
+        self._items = OrderedDict.fromkeys(storage.get(name) or [])
+        self._trim()
+
+    def _trim(self):
+        while len(self._items) > self.maxlen:
+            self._items.popitem(last=False)
+
+    def add(self, item):
+        with self._storage._lock:
+            if item in self._items:
+                return
+            self._items[item] = None
+            self._trim()
+            self._storage._dirty = True
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def to_json(self):
+        return list(self._items)
+
+
+class CoalescingStorage:
+    """
+    In-memory key/value state persisted by explicit flushes
+
+    Call flush() once per tick, or flush_if_due() to flush at most every
+    flush_interval seconds. Nothing is written when nothing changed.
+    """
+
+    def __init__(self, path, flush_interval=5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._data = {}
+        self._views = {}
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self.flushes = 0
+        self.existed = os.path.exists(path)
+        if self.existed:
+            with open(path, "r") as f:
+                self._data = json.load(f)
+
+    def get(self, key, default=None):
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                return view.to_json()
+            return self._data.get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            if key in self._views:
+                raise KeyError(f"{key} is managed by a typed view")
+            if key not in self._data or self._data[key] != value:
+                self._data[key] = value
+                self._dirty = True
+
+    def counter(self, name):
+        return Counter(self, name)
+
+    def map(self, name):
+        with self._lock:
+            view = self._views.get(name)
+            if view is None:
+                view = self._views[name] = MapView(self, name)
+            return view
+
+    def recent_set(self, name, maxlen):
+        with self._lock:
+            view = self._views.get(name)
+            if view is None:
+                view = self._views[name] = RecentSet(self, name, maxlen)
+            return view
+
+    def migrate_from(self, storage, keys):
+        """Seed a fresh state file from an existing key/value store (e.g. ctx.storage)"""
+        if self.existed:
+            return
+        with self._lock:
+            for key in keys:
+                value = storage.get(key)
+                if value is None:
+                    continue
+                view = self._views.get(key)
+                if isinstance(view, RecentSet):
+                    for item in value:
+                        view.add(item)
+                elif isinstance(view, MapView):
+                    for item_key, item_value in value.items():
+                        view.set(item_key, item_value)
+                else:
+                    self.set(key, value)
+        self.flush()
+
+    def flush(self):
+        """Persist all buffered mutations with one atomic write"""
+        with self._lock:
+            if not self._dirty:
+                self._last_flush = time.monotonic()
+                return False
+            snapshot = dict(self._data)
+            for name, view in self._views.items():
+                snapshot[name] = view.to_json()
+            payload = json.dumps(snapshot)
+            self._dirty = False
+            self._last_flush = time.monotonic()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmp_path = self.path + ".tmp"
+        try:
+            with self._write_lock:
+                with open(tmp_path, "w") as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                if hasattr(os, "O_DIRECTORY"):
+                    fd = os.open(directory, os.O_DIRECTORY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+        except OSError:
+            with self._lock:
+                self._dirty = True  # retry on the next flush
+            raise
+        self.flushes += 1
+        self.existed = True
+        return True
+
+    def flush_if_due(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            return self.flush()
+        return False
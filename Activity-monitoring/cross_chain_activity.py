@@ -0,0 +1,203 @@
+"""
+Cross-chain last-activity view
+Merges the per-chain activity streams (sepolia / bnb / optimism) into one
+"latest confirmed activity anywhere" value per owner identity, which is what
+DeadManSwitch.releaseFunds / getDeadLock take as _senderLastTxTimestamp.
+
+Each chain's stream is consumed in block order. An event becomes eligible
+once the chain head is `confirmations` blocks past it, and eligible events
+from all chains are committed through a k-way heap merge in timestamp order up
+to the common watermark (the oldest head timestamp among chains that are not
+idle). latest() is then a dictionary lookup.
+
+Only transactions an owner sent count as activity, timestamped with their
+block time: receipt streams do not carry it, so BlockTimestamps fetches it
+with eth_getBlockByNumber. The webhook arrival time would date a backfill of
+old transactions as current activity.
+
+The merger only holds what this process has seen; callers persist latest()
+and seed() it back on startup so an owner who stays inactive across a
+restart still has a last-activity value.
+"""
+
+import heapq
+import threading
+import time
+from collections import OrderedDict, deque
+
+def block_number_int(value):
+    try:
+        return int(value, 16) if isinstance(value, str) else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def receipt_block_timestamp(tx):
+    """Block timestamp carried by a stored transaction in unix seconds, or None"""
+    raw = tx.get("raw_data") or {}
+    for key in ("blockTimestamp", "timestamp"):
+        value = raw.get(key)
+        if value is not None:
+            parsed = block_number_int(value)
+            if parsed is not None:
+                return parsed
+    return None
+
+
+class BlockTimestamps:
+    """
+    Block timestamps per chain from eth_getBlockByNumber, in a bounded LRU cache
+    transports: {chain: callable sending a JSON-RPC batch}, e.g.
+    uea_identity.HttpJsonRpcTransport
+    """
+
+    def __init__(self, transports, max_entries=4096):
+        self.transports = transports
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.rpc_calls = 0
+
+    def __call__(self, chain, block_number):
+        """Unix timestamp of a block, or None when it cannot be fetched"""
+        if block_number is None:
+            return None
+        key = (chain, block_number)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        transport = self.transports.get(chain)
+        if transport is None:
+            return None
+        self.rpc_calls += 1
+        try:
+            response = transport([{"jsonrpc": "2.0", "id": 1, "method": "eth_getBlockByNumber",
+                                   "params": [hex(block_number), False]}])
+            timestamp = int(response[0]["result"]["timestamp"], 16)
+        except (OSError, LookupError, TypeError, ValueError):
+            return None
+        with self._lock:
+            self._cache[key] = timestamp
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return timestamp
+
+
+class ChainStream:
+    """Pending activity and head position for one chain"""
+
+    def __init__(self, confirmations):
+        self.confirmations = confirmations
+        self.pending = deque()
+        self.head_block = None
+        self.head_timestamp = None
+        self.last_seen = None
+
+
+class CrossChainActivityMerger:
+    """
+    Per-owner max confirmed activity timestamp across chains
+
+    resolve_owner(chain, address) maps an address seen on a chain to the
+    owner identity it belongs to; by default the lowercase address itself.
+    """
+
+    def __init__(self, confirmations=None, idle_timeout=120, resolve_owner=None):
+        self.idle_timeout = idle_timeout
+        self.resolve_owner = resolve_owner or (lambda chain, address: address.lower())
+        self._streams = {chain: ChainStream(depth) for chain, depth in (confirmations or {}).items()}
+        self._ready = []  # heap of (timestamp, sequence, chain, owner, block)
+        self._sequence = 0
+        self._latest = {}  # owner -> (timestamp, chain, block)
+        self._lock = threading.Lock()
+
+    def _stream(self, chain):
+        stream = self._streams.get(chain)
+        if stream is None:
+            stream = self._streams[chain] = ChainStream(0)
+        return stream
+
+    def advance(self, chain, head_block, head_timestamp):
+        """Move a chain's head forward (called for every delivered batch)"""
+        with self._lock:
+            stream = self._stream(chain)
+            if head_block is not None and (stream.head_block is None or head_block > stream.head_block):
+                stream.head_block = head_block
+            if stream.head_timestamp is None or head_timestamp > stream.head_timestamp:
+                stream.head_timestamp = head_timestamp
+            stream.last_seen = time.monotonic()
+            self._release_confirmed(chain, stream)
+            self._merge()
+
+    def observe(self, chain, address, block_number, block_timestamp):
+        """Record matched activity for an address on a chain"""
+        owner = self.resolve_owner(chain, address)
+        if owner is None:
+            return
+        owner = owner.lower()
+        with self._lock:
+            stream = self._stream(chain)
+            stream.pending.append((block_number, block_timestamp, owner))
+            if block_number is not None and (stream.head_block is None or block_number > stream.head_block):
+                stream.head_block = block_number
+            if stream.head_timestamp is None or block_timestamp > stream.head_timestamp:
+                stream.head_timestamp = block_timestamp
+            stream.last_seen = time.monotonic()
+            self._release_confirmed(chain, stream)
+            self._merge()
+
+    def _release_confirmed(self, chain, stream):
+        while stream.pending:
+            block, ts, owner = stream.pending[0]
+            if block is not None and stream.head_block is not None and \
+                    stream.head_block - block < stream.confirmations:
+                break
+            stream.pending.popleft()
+            self._sequence += 1
+            heapq.heappush(self._ready, (ts, self._sequence, chain, owner, block))
+
+    def _watermark(self):
+        now = time.monotonic()
+        heads = [stream.head_timestamp for stream in self._streams.values()
+                 if stream.head_timestamp is not None and stream.last_seen is not None
+                 and now - stream.last_seen < self.idle_timeout]
+        return min(heads) if heads else None
+
+    def _merge(self):
+        watermark = self._watermark()
+        while self._ready and (watermark is None or self._ready[0][0] <= watermark):
+            ts, _, chain, owner, block = heapq.heappop(self._ready)
+            current = self._latest.get(owner)
+            if current is None or ts > current[0]:
+                self._latest[owner] = (ts, chain, block)
+
+    def seed(self, owner, timestamp, chain=None, block=None):
+        """
+        Restore a previously committed value (e.g. saved before a restart)
+        Never moves an owner's latest activity backwards
+        """
+        owner = owner.lower()
+        with self._lock:
+            current = self._latest.get(owner)
+            if current is None or timestamp > current[0]:
+                self._latest[owner] = (timestamp, chain, block)
+
+    def latest(self, owner):
+        """(timestamp, chain, block) of the latest committed activity, or None"""
+        with self._lock:
+            self._merge()  # chains may have gone idle since the last event
+            return self._latest.get(owner.lower())
+
+    def onchain_timestamp(self, owner, now=None):
+        """
+        Value to pass as _senderLastTxTimestamp for this owner
+        0 means "no update", matching the contract's convention. Timestamps
+        are clamped to now so the contract's +300 s future check never
+        rejects them because of clock skew.
+        """
+        latest = self.latest(owner)
+        if latest is None:
+            return 0
+        now = time.time() if now is None else now
+        return int(min(latest[0], now))
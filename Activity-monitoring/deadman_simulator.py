@@ -0,0 +1,320 @@
+"""
+Offline DeadManSwitch simulator
+Evaluates isEligibleForRelease / getTimeUntilRelease /
+getTimeSinceLastActivity for whole lock populations in one vectorized pass
+over columnar arrays instead of one RPC call per lock, mirroring
+htlc/contracts/DeadManSwitch.sol:
+
+- _updateActivityFromWallet only moves lastActivityTime forward, accepts
+  timestamps at most FUTURE_TIMESTAMP_BUFFER seconds ahead of the block and
+  ignores released / cancelled locks
+- what-if runs pass a candidate activity timestamp per lock (0 = none),
+  like the non-view variants' _senderLastTxTimestamp argument
+
+`--check` cross-checks the vectorized engine against ReferenceLock, a
+line-by-line port of the Solidity functions, on random and edge-case locks.
+
+Usage:
+    python deadman_simulator.py --check [--bench N]
+    python deadman_simulator.py --bench N
+    python deadman_simulator.py LOCKS.json [--at TIMESTAMP] [--activity TIMESTAMP]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+# _updateActivityFromWallet: "5 min buffer for timestamp differences"
+FUTURE_TIMESTAMP_BUFFER = 300
+# Keeps lastActivityTime + inactivityPeriod inside int64
+MAX_VALUE = 2 ** 62
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+class LockArrays:
+    """Columnar view of DeadLock structs (only the fields the checks read)"""
+
+    def __init__(self, has_sender, last_activity, inactivity_period, funds_released, cancelled, lock_ids=None):
+        self.has_sender = np.asarray(has_sender, dtype=bool)
+        self.last_activity = np.asarray(last_activity, dtype=np.int64)
+        self.inactivity_period = np.asarray(inactivity_period, dtype=np.int64)
+        self.funds_released = np.asarray(funds_released, dtype=bool)
+        self.cancelled = np.asarray(cancelled, dtype=bool)
+        self.lock_ids = lock_ids
+        n = len(self.has_sender)
+        for column in (self.last_activity, self.inactivity_period, self.funds_released, self.cancelled):
+            if len(column) != n:
+                raise ValueError("lock columns must have the same length")
+        if n and (self.last_activity.min() < 0 or self.inactivity_period.min() < 0 or
+                  self.last_activity.max() >= MAX_VALUE or self.inactivity_period.max() >= MAX_VALUE):
+            raise ValueError("timestamps and periods must be in [0, 2**62)")
+
+    def __len__(self):
+        return len(self.has_sender)
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build from getDeadLockView-style dicts:
+        {"lockId", "sender", "lastActivityTime", "inactivityPeriod", "fundsReleased", "cancelled"}
+        """
+        records = list(records)
+        return cls(
+            [(r.get("sender") or ZERO_ADDRESS).lower() != ZERO_ADDRESS for r in records],
+            [int(r.get("lastActivityTime", 0)) for r in records],
+            [int(r.get("inactivityPeriod", 0)) for r in records],
+            [bool(r.get("fundsReleased")) for r in records],
+            [bool(r.get("cancelled")) for r in records],
+            lock_ids=[r.get("lockId") for r in records]
+        )
+
+    @classmethod
+    def random(cls, n, now, seed=None):
+        """Synthetic population for benchmarks and --check"""
+        rng = np.random.default_rng(seed)
+        period = rng.choice([60, 3600, 86400, 30 * 86400, 365 * 86400], n)
+        return cls(
+            rng.random(n) > 0.01,
+            now - rng.integers(-FUTURE_TIMESTAMP_BUFFER, 2 * 365 * 86400, n),
+            period,
+            rng.random(n) < 0.05,
+            rng.random(n) < 0.05
+        )
+
+
+def _activity_column(locks, activity):
+    if activity is None:
+        return np.zeros(len(locks), dtype=np.int64)
+    activity = np.broadcast_to(np.asarray(activity, dtype=np.int64), (len(locks),))
+    if activity.min(initial=0) < 0 or activity.max(initial=0) >= MAX_VALUE:
+        raise ValueError("activity timestamps must be in [0, 2**62)")
+    return activity
+
+
+def simulate_activity_update(locks, activity, now):
+    """simulateActivityUpdate: (new activity time, would update) per lock"""
+    activity = _activity_column(locks, activity)
+    would_update = ((activity > locks.last_activity) &
+                    (activity <= now + FUTURE_TIMESTAMP_BUFFER) &
+                    ~locks.funds_released & ~locks.cancelled)
+    return np.where(would_update, activity, locks.last_activity), would_update
+
+
+def effective_last_activity(locks, now, activity=None):
+    """
+    lastActivityTime after the non-view functions' optional update:
+    applied when the candidate timestamp is > 0 and the lock exists
+    """
+    if activity is None:
+        return locks.last_activity
+    activity = _activity_column(locks, activity)
+    new_time, would_update = simulate_activity_update(locks, activity, now)
+    return np.where(would_update & (activity > 0) & locks.has_sender, new_time, locks.last_activity)
+
+
+def is_eligible(locks, now, activity=None):
+    """isEligibleForReleaseView, or isEligibleForRelease(lockId, activity)"""
+    last = effective_last_activity(locks, now, activity)
+    return locks.has_sender & ~locks.funds_released & ~locks.cancelled & (now >= last + locks.inactivity_period)
+
+
+def time_until_release(locks, now, activity=None):
+    """getTimeUntilReleaseView, or getTimeUntilRelease(lockId, activity)"""
+    release_time = effective_last_activity(locks, now, activity) + locks.inactivity_period
+    remaining = np.maximum(release_time - now, 0)
+    return np.where(locks.funds_released | locks.cancelled, 0, remaining)
+
+
+def time_since_last_activity(locks, now, activity=None):
+    """
+    getTimeSinceLastActivityView, or getTimeSinceLastActivity(lockId, activity)
+    Returns (seconds, reverts): the subtraction reverts on-chain when the
+    last activity is up to FUTURE_TIMESTAMP_BUFFER seconds in the future;
+    those entries are 0 with reverts set
+    """
+    since = now - effective_last_activity(locks, now, activity)
+    reverts = locks.has_sender & (since < 0)
+    return np.where(locks.has_sender & ~reverts, since, 0), reverts
+
+
+def evaluate(locks, now, activity=None):
+    """All release checks for every lock at block timestamp `now`"""
+    since, reverts = time_since_last_activity(locks, now, activity)
+    return {
+        "last_activity": effective_last_activity(locks, now, activity),
+        "eligible": is_eligible(locks, now, activity),
+        "time_until_release": time_until_release(locks, now, activity),
+        "time_since_last_activity": since,
+        "time_since_reverts": reverts
+    }
+
+
+class ContractRevert(Exception):
+    pass
+
+
+class ReferenceLock:
+    """Scalar port of one DeadLock and the contract functions, for --check"""
+
+    def __init__(self, has_sender, last_activity, inactivity_period, funds_released, cancelled):
+        self.sender = "0x1" if has_sender else ZERO_ADDRESS
+        self.lastActivityTime = int(last_activity)
+        self.inactivityPeriod = int(inactivity_period)
+        self.fundsReleased = bool(funds_released)
+        self.cancelled = bool(cancelled)
+
+    def _updateActivityFromWallet(self, ts, now):
+        if (ts > self.lastActivityTime and
+                ts <= now + 300 and
+                not self.fundsReleased and
+                not self.cancelled):
+            self.lastActivityTime = ts
+
+    def isEligibleForRelease(self, ts, now):
+        if ts > 0 and self.sender != ZERO_ADDRESS:
+            self._updateActivityFromWallet(ts, now)
+        return (self.sender != ZERO_ADDRESS and
+                not self.fundsReleased and
+                not self.cancelled and
+                now >= self.lastActivityTime + self.inactivityPeriod)
+
+    def getTimeUntilRelease(self, ts, now):
+        if ts > 0 and self.sender != ZERO_ADDRESS:
+            self._updateActivityFromWallet(ts, now)
+        if self.fundsReleased or self.cancelled:
+            return 0
+        release_time = self.lastActivityTime + self.inactivityPeriod
+        if now >= release_time:
+            return 0
+        return release_time - now
+
+    def getTimeSinceLastActivity(self, ts, now):
+        if self.sender == ZERO_ADDRESS:
+            return 0
+        if ts > 0:
+            self._updateActivityFromWallet(ts, now)
+        if now < self.lastActivityTime:
+            raise ContractRevert("arithmetic underflow")
+        return now - self.lastActivityTime
+
+    def simulateActivityUpdate(self, ts, now):
+        would_update = (ts > self.lastActivityTime and
+                        ts <= now + 300 and
+                        not self.fundsReleased and
+                        not self.cancelled)
+        return (ts if would_update else self.lastActivityTime), would_update
+
+
+def edge_case_population(now):
+    """Locks and candidate timestamps on every boundary the contract checks"""
+    rows, activity = [], []
+    for has_sender in (True, False):
+        for released, cancelled in ((False, False), (True, False), (False, True)):
+            for last in (now - 3600, now - 3599, now - 3601, now, now + 300):
+                for ts in (0, last - 1, last, last + 1, now, now + 299, now + 300, now + 301):
+                    rows.append((has_sender, last, 3600, released, cancelled))
+                    activity.append(max(ts, 0))
+    columns = list(zip(*rows))
+    return LockArrays(*columns), np.asarray(activity, dtype=np.int64)
+
+
+def random_population(n, now, seed=0):
+    """(locks, activity) for n random locks, 30% of them without activity"""
+    rng = np.random.default_rng(seed)
+    locks = LockArrays.random(n, now, seed)
+    activity = np.where(rng.random(n) < 0.3, 0,
+                        now - rng.integers(-2 * FUTURE_TIMESTAMP_BUFFER, 400 * 86400, n))
+    return locks, activity
+
+
+def compare_population(locks, activity, now):
+    """
+    Evaluate one population with and without activity against ReferenceLock
+    Returns (lock index, contract args, activity, expected, actual) per mismatch
+    """
+    mismatches = []
+    for candidate in (None, activity):
+        result = evaluate(locks, now, candidate)
+        new_time, would_update = simulate_activity_update(locks, activity, now)
+        for i in range(len(locks)):
+            ts = 0 if candidate is None else int(candidate[i])
+            args = tuple(column[i].item() for column in (locks.has_sender, locks.last_activity,
+                                                         locks.inactivity_period, locks.funds_released,
+                                                         locks.cancelled))
+            expected_eligible = ReferenceLock(*args).isEligibleForRelease(ts, now)
+            expected_until = ReferenceLock(*args).getTimeUntilRelease(ts, now)
+            try:
+                expected_since, expected_revert = ReferenceLock(*args).getTimeSinceLastActivity(ts, now), False
+            except ContractRevert:
+                expected_since, expected_revert = 0, True
+            expected_update = ReferenceLock(*args).simulateActivityUpdate(int(activity[i]), now)
+            actual = (bool(result["eligible"][i]), int(result["time_until_release"][i]),
+                      int(result["time_since_last_activity"][i]), bool(result["time_since_reverts"][i]),
+                      (int(new_time[i]), bool(would_update[i])))
+            expected = (expected_eligible, expected_until, expected_since, expected_revert, expected_update)
+            if actual != expected:
+                mismatches.append((i, args, ts, expected, actual))
+    return mismatches
+
+
+def check(n=100000, seed=0, now=None):
+    """Compare the vectorized engine with ReferenceLock; returns mismatch count"""
+    now = int(time.time()) if now is None else now
+    mismatches = (compare_population(*edge_case_population(now), now)
+                  + compare_population(*random_population(n, now, seed), now))
+    for i, args, ts, expected, actual in mismatches[:10]:
+        print(f"❌ lock {i} {args} activity={ts}: expected {expected}, got {actual}")
+    return len(mismatches)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-evaluate DeadManSwitch release checks")
+    parser.add_argument("locks", nargs="?", help="JSON list of getDeadLockView-style lock records")
+    parser.add_argument("--at", type=int, default=None, help="block timestamp to evaluate at (default: now)")
+    parser.add_argument("--activity", type=int, default=None,
+                        help="what-if: candidate activity timestamp applied to every lock")
+    parser.add_argument("--check", action="store_true", help="cross-check against the scalar contract port")
+    parser.add_argument("--bench", type=int, metavar="N", help="time one pass over N synthetic locks (with --check: N random locks to compare)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    now = int(time.time()) if args.at is None else args.at
+
+    if args.check:
+        n = args.bench or 20000
+        mismatches = check(n, args.seed, now)
+        if mismatches:
+            print(f"❌ {mismatches} mismatches against the contract semantics")
+            return 1
+        print(f"✅ Vectorized results match the contract semantics ({n} random locks + edge cases)")
+        return 0
+
+    if args.bench:
+        locks = LockArrays.random(args.bench, now, args.seed)
+        started = time.perf_counter()
+        result = evaluate(locks, now, args.activity)
+        elapsed = time.perf_counter() - started
+        print(f"⚡ {len(locks)} locks evaluated in {elapsed * 1000:.1f}ms "
+              f"({len(locks) / elapsed:,.0f} locks/s) | eligible: {int(result['eligible'].sum())}")
+        return 0
+
+    if not args.locks:
+        parser.error("a locks file, --check or --bench is required")
+    with open(args.locks, "r") as f:
+        locks = LockArrays.from_records(json.load(f))
+    result = evaluate(locks, now, args.activity)
+    for i, lock_id in enumerate(locks.lock_ids):
+        print(json.dumps({
+            "lockId": lock_id,
+            "eligible": bool(result["eligible"][i]),
+            "timeUntilRelease": int(result["time_until_release"][i]),
+            "timeSinceLastActivity": None if result["time_since_reverts"][i] else int(result["time_since_last_activity"][i])
+        }))
+    print(f"🎯 {int(result['eligible'].sum())}/{len(locks)} locks eligible for release at {now}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""
+Streaming fee and gas analytics
+Running sums and DDSketch quantile sketches of what transactions cost, kept
+per chain (every ingested receipt) and per wallet (the wallet's
+outgoing transactions, i.e. what it actually paid). Each update is O(1) and
+memory per sketch is bounded, so "p95 gas price on bnb" or "how much has this
+wallet spent" is answered without rescanning stored transactions.
+
+Fee = gasUsed * effectiveGasPrice, plus l1Fee on Optimism.
+"""
+
+import math
+import threading
+
+GWEI = 10 ** 9
+ETHER = 10 ** 18
+
+
+def _hex_int(value):
+    if value in (None, ""):
+        return None
+    try:
+        return int(value, 16) if isinstance(value, str) else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def transaction_fee(tx):
+    """
+    (gas_used, gas_price, fee, l1_fee) in wei for an extracted transaction
+    gas_price and fee are None when the receipt has no effectiveGasPrice
+    """
+    gas_used = _hex_int(tx.get("gasUsed"))
+    if gas_used is None:
+        return None
+    gas_price = _hex_int(tx.get("effectiveGasPrice"))
+    l1_fee = _hex_int((tx.get("raw_data") or {}).get("l1Fee")) or 0
+    fee = gas_used * gas_price + l1_fee if gas_price is not None else None
+    return gas_used, gas_price, fee, l1_fee
+
+
+class DDSketch:
+    """
+    Quantile sketch with relative error guarantees
+    Values fall into logarithmic buckets of ratio gamma, so any returned
+    quantile is within relative_accuracy of the true value. When more than
+    max_bins buckets are used the lowest ones are collapsed, which only
+    degrades accuracy for the smallest values.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_bins=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value, count=1):
+        if value <= 0:
+            self.zero_count += count
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + count
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def _collapse(self):
+        keys = sorted(self.bins)
+        excess = keys[:len(keys) - self.max_bins]
+        self.bins[keys[len(excess)]] += sum(self.bins.pop(key) for key in excess)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0
+        seen = self.zero_count
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def merge(self, other):
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        while len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self):
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_bins": self.max_bins,
+            "bins": [[key, count] for key, count in self.bins.items()],
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["relative_accuracy"], data["max_bins"])
+        sketch.bins = {key: count for key, count in data["bins"]}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
+
+
+class FeeStats:
+    """Exact sums and quantile sketches for one wallet or chain"""
+
+    SKETCHES = ("gas_price", "fee", "gas_used")
+
+    def __init__(self):
+        self.count = 0
+        self.total_fee = 0
+        self.total_l1_fee = 0
+        self.total_gas_used = 0
+        self.sketches = {name: DDSketch() for name in self.SKETCHES}
+
+    def record(self, gas_used, gas_price, fee, l1_fee):
+        self.count += 1
+        self.total_gas_used += gas_used
+        self.total_l1_fee += l1_fee
+        self.sketches["gas_used"].add(gas_used)
+        if gas_price is not None:
+            self.total_fee += fee
+            self.sketches["gas_price"].add(gas_price)
+            self.sketches["fee"].add(fee)
+
+    def merge(self, other):
+        self.count += other.count
+        self.total_fee += other.total_fee
+        self.total_l1_fee += other.total_l1_fee
+        self.total_gas_used += other.total_gas_used
+        for name, sketch in other.sketches.items():
+            self.sketches[name].merge(sketch)
+
+    def summary(self, quantiles=(0.5, 0.95)):
+        def pct(name, scale):
+            values = {}
+            for q in quantiles:
+                value = self.sketches[name].quantile(q)
+                values[f"p{round(q * 100)}"] = None if value is None else value / scale
+            return values
+
+        return {
+            "count": self.count,
+            "total_fee_eth": self.total_fee / ETHER,
+            "total_l1_fee_eth": self.total_l1_fee / ETHER,
+            "total_gas_used": self.total_gas_used,
+            "gas_price_gwei": pct("gas_price", GWEI),
+            "fee_eth": pct("fee", ETHER),
+            "gas_used": pct("gas_used", 1)
+        }
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_fee": str(self.total_fee),
+            "total_l1_fee": str(self.total_l1_fee),
+            "total_gas_used": str(self.total_gas_used),
+            "sketches": {name: sketch.to_dict() for name, sketch in self.sketches.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data["count"]
+        stats.total_fee = int(data["total_fee"])
+        stats.total_l1_fee = int(data["total_l1_fee"])
+        stats.total_gas_used = int(data["total_gas_used"])
+        stats.sketches = {name: DDSketch.from_dict(sketch) for name, sketch in data["sketches"].items()}
+        return stats
+
+
+class FeeAnalytics:
+    """Thread-safe FeeStats per chain and per (chain, wallet)"""
+
+    def __init__(self):
+        self._chains = {}
+        self._wallets = {}
+        self._lock = threading.Lock()
+
+    def record(self, chain, tx, wallet=None):
+        """
+        Add one transaction to the chain's stats, and to wallet's stats when
+        the wallet sent (and therefore paid for) it
+        """
+        fee = transaction_fee(tx)
+        if fee is None:
+            return None
+        with self._lock:
+            chain_stats = self._chains.get(chain)
+            if chain_stats is None:
+                chain_stats = self._chains[chain] = FeeStats()
+            chain_stats.record(*fee)
+            if wallet is not None and (tx.get("from") or "").lower() == wallet.lower():
+                key = (chain, wallet.lower())
+                wallet_stats = self._wallets.get(key)
+                if wallet_stats is None:
+                    wallet_stats = self._wallets[key] = FeeStats()
+                wallet_stats.record(*fee)
+        return fee
+
+    def merge(self, other):
+        """Add another FeeAnalytics' stats, e.g. those of one committed delivery"""
+        with other._lock:
+            sources = ((self._chains, list(other._chains.items())),
+                       (self._wallets, list(other._wallets.items())))
+        with self._lock:
+            for target, items in sources:
+                for key, stats in items:
+                    current = target.get(key)
+                    if current is None:
+                        current = target[key] = FeeStats()
+                    current.merge(stats)
+
+    def query(self, chain=None, wallet=None, quantiles=(0.5, 0.95)):
+        """
+        Summaries per chain, or per chain for one wallet
+        {"chains": {chain: summary}} / {"wallets": {chain: summary}}
+        """
+        with self._lock:
+            if wallet is None:
+                return {"chains": {name: stats.summary(quantiles) for name, stats in self._chains.items()
+                                   if chain is None or name == chain}}
+            return {"wallets": {name: stats.summary(quantiles) for (name, address), stats in self._wallets.items()
+                                if address == wallet.lower() and (chain is None or name == chain)}}
+
+    def is_anomalous(self, chain, fee, quantile=0.99, min_samples=100):
+        """True if a fee (wei) is above the chain's given quantile"""
+        with self._lock:
+            stats = self._chains.get(chain)
+            if stats is None or fee is None or stats.sketches["fee"].count < min_samples:
+                return False
+            return fee > stats.sketches["fee"].quantile(quantile)
+
+    def snapshot(self, chain, wallet):
+        """Serializable state of one chain and wallet, or None"""
+        with self._lock:
+            chain_stats = self._chains.get(chain)
+            if chain_stats is None:
+                return None
+            wallet_stats = self._wallets.get((chain, wallet.lower()))
+            return {"chain": chain_stats.to_dict(),
+                    "wallet": wallet_stats.to_dict() if wallet_stats else None}
+
+    def restore(self, chain, wallet, data):
+        with self._lock:
+            self._chains[chain] = FeeStats.from_dict(data["chain"])
+            if data.get("wallet"):
+                self._wallets[(chain, wallet.lower())] = FeeStats.from_dict(data["wallet"])
@@ -0,0 +1,55 @@
+"""
+Webhook ingestion and wallet matching helpers
+Used by monitor_pipeline.py, which both the combined webhook server and the
+replay tool run, so live and replayed traffic go through the same code
+"""
+
+from datetime import datetime
+
+from chain_config import DEFAULT_CHAIN
+
+
+def detect_receipt_chain(receipt, default=DEFAULT_CHAIN):
+    """Look for chain-specific fields on a single receipt"""
+    if receipt.get("chainId") == "0x38":  # BNB Chain
+        return "bnb"
+    if "l1Fee" in receipt or "l1GasUsed" in receipt:  # Optimism
+        return "optimism"
+    return default
+
+
+def extract_transaction(receipt, received_at=None):
+    """Build the stored transaction record from a raw receipt"""
+    timestamp = received_at or datetime.now()
+    return {
+        "hash": receipt.get("transactionHash", ""),
+        "blockNumber": receipt.get("blockNumber", ""),
+        "blockHash": receipt.get("blockHash", ""),
+        "from": receipt.get("from", ""),
+        "to": receipt.get("to", ""),
+        "contractAddress": receipt.get("contractAddress"),
+        "cumulativeGasUsed": receipt.get("cumulativeGasUsed", ""),
+        "effectiveGasPrice": receipt.get("effectiveGasPrice", ""),
+        "gasUsed": receipt.get("gasUsed", ""),
+        "status": receipt.get("status", ""),
+        "timestamp": timestamp.isoformat(),
+        "raw_data": receipt
+    }
+
+
+def transaction_id(tx):
+    """Identifier used to skip already processed transactions"""
+    return tx.get("hash") or tx.get("blockHash") or None
+
+
+def match_wallet(tx, wallet):
+    """
+    Check if a transaction involves the monitored wallet
+    Returns "outgoing", "incoming" or None
+    """
+    monitored_lower = wallet.lower()
+    if (tx.get("from") or "").lower() == monitored_lower:
+        return "outgoing"
+    if (tx.get("to") or "").lower() == monitored_lower:
+        return "incoming"
+    return None
@@ -0,0 +1,265 @@
+"""
+Idempotent webhook ingestion
+Providers redeliver batches when a response times out. This index remembers
+which receipts, keyed on (chain, blockNumber, transactionIndex), and which
+deliveries have already been ingested so a redelivery is acknowledged
+without being stored again.
+
+State is an append-only log of committed deliveries plus a periodically
+compacted snapshot. Per chain only the last `retain_blocks` blocks below the
+highest seen block are kept; anything older is past finality and is pruned.
+
+A receipt or delivery key claimed by a request that is still streaming is
+neither new nor a duplicate: the other request may yet abort, so a request
+that runs into one raises DeliveryInFlight and should be retried later.
+"""
+
+import heapq
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Headers that identify one delivery; the batch range headers are combined
+DELIVERY_ID_HEADERS = ("idempotency-key", "x-delivery-id")
+BATCH_RANGE_HEADERS = ("stream-id", "batch-start-range", "batch-end-range")
+
+
+class DeliveryInFlight(Exception):
+    """Part of this delivery is being ingested by another request"""
+
+
+def delivery_key(headers):
+    """Stable id of a delivery from its request headers, or None"""
+    for name in DELIVERY_ID_HEADERS:
+        value = headers.get(name)
+        if value:
+            return f"{name}:{value}"
+    values = [headers.get(name) for name in BATCH_RANGE_HEADERS]
+    if values[1] and values[2]:
+        return "batch:" + ":".join(value or "" for value in values)
+    return None
+
+
+def receipt_key(receipt):
+    """(blockNumber, transactionIndex) of a raw receipt, or None"""
+    try:
+        block = int(receipt["blockNumber"], 16)
+    except (KeyError, TypeError, ValueError):
+        return None
+    index = receipt.get("transactionIndex")
+    try:
+        return block, int(index, 16)
+    except (TypeError, ValueError):
+        # No usable index: fall back to the hash within the block
+        tx_hash = receipt.get("transactionHash")
+        return (block, tx_hash.lower()) if tx_hash else None
+
+
+class ChainIndex:
+    """Ingested receipt keys for one chain"""
+
+    def __init__(self):
+        self.blocks = {}  # block -> set of tx indexes (or hashes)
+        self.heap = []
+        self.head = None
+
+    def add(self, block, index):
+        entries = self.blocks.get(block)
+        if entries is None:
+            entries = self.blocks[block] = set()
+            heapq.heappush(self.heap, block)
+        entries.add(index)
+        if self.head is None or block > self.head:
+            self.head = block
+
+    def contains(self, block, index):
+        entries = self.blocks.get(block)
+        return entries is not None and index in entries
+
+    def prune(self, retain_blocks):
+        if self.head is None:
+            return
+        floor = self.head - retain_blocks
+        while self.heap and self.heap[0] < floor:
+            self.blocks.pop(heapq.heappop(self.heap), None)
+
+
+class Delivery:
+    """Receipts accepted from one request; recorded only on commit()"""
+
+    def __init__(self, index, key):
+        self.index = index
+        self.key = key
+        self.accepted = []
+        self.duplicates = 0
+
+    def is_new(self, chain, receipt):
+        """
+        True if the receipt has not been ingested before (and claim it)
+        Raises DeliveryInFlight if another delivery holds it uncommitted
+        """
+        key = receipt_key(receipt)
+        if key is None:
+            return True
+        if not self.index._claim(self, chain, key):
+            self.duplicates += 1
+            return False
+        self.accepted.append((chain, key))
+        return True
+
+    def commit(self):
+        self.index._commit(self)
+
+    def abort(self):
+        self.index._release(self)
+
+
+class IdempotencyIndex:
+    """
+    Bounded, persistent record of ingested deliveries and receipts
+    """
+
+    def __init__(self, directory, retain_blocks=None, default_retain_blocks=1024,
+                 max_deliveries=10000, compact_after=5000):
+        self.directory = directory
+        self.retain_blocks = retain_blocks or {}
+        self.default_retain_blocks = default_retain_blocks
+        self.max_deliveries = max_deliveries
+        self.compact_after = compact_after
+        self._chains = {}
+        self._deliveries = OrderedDict()
+        self._inflight = {}  # (chain, receipt key) -> claiming Delivery
+        self._inflight_deliveries = set()
+        self._log = None
+        self._log_entries = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    # ---- request flow ----
+
+    def seen_delivery(self, key):
+        with self._lock:
+            return key is not None and key in self._deliveries
+
+    def begin(self, key=None):
+        """Start a delivery; raises DeliveryInFlight if key is being ingested"""
+        with self._lock:
+            if key is not None:
+                if key in self._inflight_deliveries:
+                    raise DeliveryInFlight(f"delivery {key} is still being ingested")
+                self._inflight_deliveries.add(key)
+        return Delivery(self, key)
+
+    def _chain(self, chain):
+        index = self._chains.get(chain)
+        if index is None:
+            index = self._chains[chain] = ChainIndex()
+        return index
+
+    def _claim(self, delivery, chain, key):
+        with self._lock:
+            owner = self._inflight.get((chain, key))
+            if owner is not None and owner is not delivery:
+                raise DeliveryInFlight(f"{chain} receipt {key} is still being ingested")
+            if owner is delivery or self._chain(chain).contains(*key):
+                return False
+            self._inflight[(chain, key)] = delivery
+            return True
+
+    def _release(self, delivery):
+        with self._lock:
+            for item in delivery.accepted:
+                self._inflight.pop(item, None)
+            self._inflight_deliveries.discard(delivery.key)
+
+    def _commit(self, delivery):
+        with self._lock:
+            for chain, key in delivery.accepted:
+                self._inflight.pop((chain, key), None)
+                self._chain(chain).add(*key)
+            if delivery.key is not None:
+                self._inflight_deliveries.discard(delivery.key)
+                self._remember_delivery(delivery.key)
+            for chain in {chain for chain, _ in delivery.accepted}:
+                self._chains[chain].prune(self.retain_blocks.get(chain, self.default_retain_blocks))
+            self._append_log({"d": delivery.key, "r": [[chain, block, index] for chain, (block, index) in delivery.accepted]})
+
+    def _remember_delivery(self, key):
+        self._deliveries[key] = True
+        self._deliveries.move_to_end(key)
+        while len(self._deliveries) > self.max_deliveries:
+            self._deliveries.popitem(last=False)
+
+    # ---- persistence ----
+
+    def _snapshot_path(self):
+        return os.path.join(self.directory, "snapshot.json")
+
+    def _log_path(self):
+        return os.path.join(self.directory, "deliveries.log")
+
+    def _append_log(self, entry):
+        if self._log is None:
+            self._log = open(self._log_path(), "a", encoding="utf-8")
+        self._log.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._log.flush()
+        self._log_entries += 1
+        if self._log_entries >= self.compact_after:
+            self._compact()
+
+    def _compact(self):
+        """Write the pruned state as a snapshot and truncate the log"""
+        snapshot = {
+            "deliveries": list(self._deliveries),
+            "chains": {
+                chain: [[block, sorted(indexes, key=str)] for block, indexes in index.blocks.items()]
+                for chain, index in self._chains.items()
+            }
+        }
+        tmp_path = self._snapshot_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, self._snapshot_path())
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        open(self._log_path(), "w").close()
+        self._log_entries = 0
+
+    def _load(self):
+        if os.path.exists(self._snapshot_path()):
+            try:
+                with open(self._snapshot_path(), "r") as f:
+                    snapshot = json.load(f)
+                for key in snapshot.get("deliveries", []):
+                    self._remember_delivery(key)
+                for chain, blocks in snapshot.get("chains", {}).items():
+                    for block, indexes in blocks:
+                        for index in indexes:
+                            self._chain(chain).add(block, index)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable ingest index snapshot: {e}")
+        if os.path.exists(self._log_path()):
+            with open(self._log_path(), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # torn final write
+                    if entry.get("d") is not None:
+                        self._remember_delivery(entry["d"])
+                    for chain, block, index in entry.get("r", []):
+                        self._chain(chain).add(block, index)
+                    self._log_entries += 1
+        for chain, index in self._chains.items():
+            index.prune(self.retain_blocks.get(chain, self.default_retain_blocks))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "deliveries": len(self._deliveries),
+                "chains": {chain: {"blocks": len(index.blocks), "head": index.head}
+                           for chain, index in self._chains.items()}
+            }
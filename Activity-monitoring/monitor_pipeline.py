@@ -0,0 +1,355 @@
+"""
+Webhook-to-activity pipeline of the combined monitor
+Ingests one /webhook delivery (dedup, extraction, fee stats, archives,
+working file) and, once it is committed to the dedup index, hands every
+receipt that involves the monitored wallet to its chain's matching queue.
+Irrelevant receipts are done once their fees are recorded, so the queues hold
+matches only and stay small however busy the chain is. The agents drain those
+queues on their ticks (process()); a burst no longer loses matches that the
+working file's last 100 receipts would have cut off.
+
+A delivery that fails, or overlaps one still streaming, leaves no trace in
+the queues, fee stats or cross-chain heads, and is answered with
+status "error" / "retry" so the provider sends it again.
+
+Nothing here depends on FastAPI or uAgents: the live server and
+replay_webhooks.py run the same ingestion and matching code.
+
+The per-chain working files are the restart record: they keep the last
+`window` receipts plus up to `window` matched receipts that fell out of that
+window, and seed() re-queues whatever the agent had not processed yet.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+
+from chain_config import DEFAULT_CHAIN
+from cross_chain_activity import block_number_int, receipt_block_timestamp
+from ingest import detect_receipt_chain, extract_transaction, match_wallet, transaction_id
+from fee_analytics import FeeAnalytics, transaction_fee
+from ingest_dedup import DeliveryInFlight, delivery_key
+from priority_matching import DeadlineQueue, lock_remaining
+from webhook_stream import iter_webhook_receipts
+
+# Processed hashes remembered per chain; above the working file's size (window
+# recent + window matched receipts) so seed() never re-queues processed ones
+PROCESSED_TX_LIMIT = 1000
+
+
+class MonitorPipeline:
+    """
+    Ingestion stage plus the per-chain matching queues
+
+    By default the queues are FIFO and an agent tick matches everything
+    queued. With priority=True a matched receipt is queued with the time left
+    until its lock becomes releasable, most urgent first, and a tick takes at
+    most batch_size of them.
+    """
+
+    def __init__(self, chains, ingest_index, receipt_archive=None, webhook_archive=None,
+                 cross_chain=None, resolve_owner=None, block_timestamps=None, fee_analytics=None,
+                 histograms=None, broadcaster=None, notify=None, priority=False, inactivity_period=0,
+                 batch_size=200, horizon=3600, window=100, log=print):
+        self.chains = chains
+        self.ingest_index = ingest_index
+        self.receipt_archive = receipt_archive
+        self.webhook_archive = webhook_archive
+        self.cross_chain = cross_chain
+        self.resolve_owner = resolve_owner or (lambda chain, address: address.lower())
+        self.block_timestamps = block_timestamps
+        self.fee_analytics = fee_analytics
+        self.histograms = histograms
+        self.broadcaster = broadcaster
+        self.notify = notify
+        self.priority = priority
+        self.inactivity_period = inactivity_period
+        self.batch_size = batch_size
+        self.window = window
+        self.log = log
+        self.queues = {chain: DeadlineQueue(horizon) for chain in chains}
+
+    # ---- ingestion stage ----
+
+    async def ingest(self, chunks, headers, received_at=None):
+        """
+        Run one delivery through the ingestion stage
+        chunks: async iterator of raw body chunks; headers: request headers
+        Returns the response body for the provider; any status but "ok"
+        means nothing was stored and the delivery should be retried
+        """
+        delivery = None
+        record = None
+        try:
+            # Redelivered batch: acknowledge without parsing or storing it again
+            key = delivery_key(headers)
+            if self.ingest_index.seen_delivery(key):
+                self.log(f"♻️ Duplicate delivery {key} acknowledged")
+                return {"status": "ok", "transactions_stored": 0, "duplicate": True}
+            delivery = self.ingest_index.begin(key)
+            received_at = time.time() if received_at is None else received_at
+            arrival = datetime.fromtimestamp(received_at)
+
+            # The raw body is spooled to the archive chunk by chunk
+            record = self.webhook_archive.record(received_at, headers) if self.webhook_archive is not None else None
+            chain = None
+            wallet = None
+            matches = []
+            fees = FeeAnalytics() if self.fee_analytics is not None else None
+            window = deque(maxlen=self.window)
+            dropped_matches = deque(maxlen=self.window)
+            archive_batch = []
+            head_block = None
+            head_timestamp = None
+            stored = 0
+
+            async for receipt in iter_webhook_receipts(chunks, headers.get("content-encoding"),
+                                                       record.write if record is not None else None):
+                if chain is None:
+                    # Auto-detect chain type from the first receipt
+                    chain = detect_receipt_chain(receipt)
+                    wallet = self.chains[chain]["wallet"]
+                    self.log(f"\n🔗 CHAIN DETECTED: {chain.upper()}")
+                    self.log(f"📥 Received webhook data from {chain.upper()}:")
+
+                if not delivery.is_new(chain, receipt):
+                    continue
+
+                tx = extract_transaction(receipt, arrival)
+                stored += 1
+                self.log(f"  📝 Tx: {tx['hash'][:15]}... | From: {tx['from'][:10]}... | To: {tx['to'][:10]}...")
+                if fees is not None:
+                    fees.record(chain, tx, wallet)
+                direction = match_wallet(tx, wallet)
+                if direction:
+                    self.log(f"  ⚡ {direction.upper()} match for monitored wallet in block {tx['blockNumber']}")
+                    matches.append((tx, direction))
+
+                # Keep matches that scroll out of the working-file window
+                if len(window) == window.maxlen and match_wallet(window[0], wallet):
+                    dropped_matches.append(window[0])
+                window.append(tx)
+
+                archive_batch.append(tx)
+                if len(archive_batch) >= 500 and self.receipt_archive is not None:
+                    # Sealing a segment compresses and rewrites the index: keep it off the loop
+                    await asyncio.to_thread(self.receipt_archive.append, chain, archive_batch)
+                    archive_batch = []
+
+                block = block_number_int(tx["blockNumber"])
+                if block is not None:
+                    head_block = block if head_block is None else max(head_block, block)
+                    ts = receipt_block_timestamp(tx)
+                    ts = received_at if ts is None else ts  # only orders heads, never stored as activity
+                    head_timestamp = ts if head_timestamp is None else max(head_timestamp, ts)
+
+            chain = chain or DEFAULT_CHAIN
+            if record is not None:
+                await asyncio.to_thread(record.commit)  # gzip-compresses the spooled body
+                record = None
+            if self.receipt_archive is not None:
+                await asyncio.to_thread(self.receipt_archive.append, chain, archive_batch)
+            self.update_working_file(chain, list(dropped_matches) + list(window))
+            delivery.commit()
+
+            # Committed: only now does the rest of the monitor see the delivery
+            if fees is not None:
+                self.fee_analytics.merge(fees)
+            remaining = self.remaining(chain, received_at) if matches and self.priority else None
+            for tx, direction in matches:
+                self.enqueue(chain, tx, direction, remaining, received_at)
+            if matches:
+                self.log(f"⚡ {len(matches)} {chain.upper()} matches queued for matching")
+
+            # Move the chain head so pending cross-chain activity can confirm
+            if head_block is not None and self.cross_chain is not None:
+                self.cross_chain.advance(chain, head_block, head_timestamp)
+
+            self.log(f"💾 Stored {stored} {chain.upper()} transactions")
+            if delivery.duplicates:
+                self.log(f"♻️ Skipped {delivery.duplicates} already ingested receipts")
+            self.log("-" * 60)
+
+            return {"status": "ok", "transactions_stored": stored, "chain": chain}
+
+        except Exception as e:
+            if delivery is not None:
+                delivery.abort()
+            if record is not None:
+                record.abort()
+            if isinstance(e, DeliveryInFlight):
+                self.log(f"⏳ {e}; asking the provider to retry")
+                return {"status": "retry", "message": str(e)}
+            self.log(f"❌ Error processing webhook: {str(e)}")
+            return {"status": "error", "message": str(e)}
+
+    def update_working_file(self, chain, transactions):
+        """
+        Append to the chain's working file, keeping the last `window`
+        receipts plus up to `window` older matched ones
+        """
+        transactions_file = self.chains[chain]["file"]
+        existing_transactions = []
+        if os.path.exists(transactions_file):
+            try:
+                with open(transactions_file, 'r') as f:
+                    existing_transactions = json.load(f)
+            except (OSError, ValueError):
+                existing_transactions = []
+
+        existing_transactions.extend(transactions)
+        if len(existing_transactions) > self.window:
+            wallet = self.chains[chain]["wallet"]
+            older = existing_transactions[:-self.window]
+            matched = [tx for tx in older if match_wallet(tx, wallet)][-self.window:]
+            existing_transactions = matched + existing_transactions[-self.window:]
+
+        with open(transactions_file, 'w') as f:
+            json.dump(existing_transactions, f, indent=2)
+
+    def observe_outgoing(self, chain, wallet, tx, logger):
+        """Feed a transaction the wallet sent to the merger, at its block time"""
+        block = block_number_int(tx.get("blockNumber"))
+        block_time = receipt_block_timestamp(tx)
+        if block_time is None and self.block_timestamps is not None:
+            block_time = self.block_timestamps(chain, block)
+        if block_time is None:
+            logger.warning(f"⚠️ No block timestamp for {chain.upper()} block {tx.get('blockNumber')}; "
+                           f"not counted as last activity")
+            return
+        self.cross_chain.observe(chain, wallet, block, block_time)
+
+    # ---- matching queues ----
+
+    def remaining(self, chain, now=None):
+        """Seconds until the chain wallet's lock is releasable; 0 (most urgent) when unknown"""
+        if not self.inactivity_period or self.cross_chain is None:
+            return 0
+        latest = self.cross_chain.latest(self.resolve_owner(chain, self.chains[chain]["wallet"]))
+        if not latest:
+            return 0
+        return lock_remaining(latest[0], self.inactivity_period, now)
+
+    def enqueue(self, chain, tx, direction, remaining=None, now=None):
+        """Queue a matched receipt for the chain's matching stage (once per hash)"""
+        tx_hash = transaction_id(tx)
+        if not tx_hash:
+            return False
+        return self.queues[chain].push(tx_hash, (tx, direction), remaining if self.priority else None, now)
+
+    def seed(self, chain, processed, now=None):
+        """Re-queue working-file matches not processed before a restart"""
+        transactions_file = self.chains[chain]["file"]
+        if not os.path.exists(transactions_file):
+            return 0
+        try:
+            with open(transactions_file, 'r') as f:
+                tx_list = json.load(f)
+        except (OSError, ValueError) as e:
+            self.log(f"⚠️ Cannot seed {chain} queue from {transactions_file}: {e}")
+            return 0
+        wallet = self.chains[chain]["wallet"]
+        queued = 0
+        for tx in tx_list:
+            if transaction_id(tx) in processed:
+                continue
+            direction = match_wallet(tx, wallet)
+            if direction:
+                remaining = self.remaining(chain, now) if self.priority else None
+                queued += self.enqueue(chain, tx, direction, remaining, now)
+        return queued
+
+    def next_batch(self, chain, processed):
+        """
+        The queued matches for one tick: all of them, or with priority the
+        batch_size most urgent ones
+        Returns [(tx_hash, tx, direction)], skipping already processed hashes
+        """
+        queue = self.queues[chain]
+        batch = []
+        for tx_hash, (tx, direction), _ in queue.drain(self.batch_size if self.priority else len(queue)):
+            if tx_hash not in processed:
+                batch.append((tx_hash, tx, direction))
+        return batch
+
+    # ---- matching stage ----
+
+    @staticmethod
+    def processed(state):
+        """Recently processed hashes kept in a chain's CoalescingStorage"""
+        return state.recent_set("processed_tx", maxlen=PROCESSED_TX_LIMIT)
+
+    def process(self, chain, state, logger, now=None):
+        """
+        One agent tick: report the next batch of the chain's queued matches
+        state: the chain's CoalescingStorage; logger: ctx.logger or a
+        logging.Logger. Returns the detected activities in processing order.
+        """
+        wallet = self.chains[chain]["wallet"]
+        processed_tx = self.processed(state)
+        activity_count = state.counter("activity_count")
+        backlog = self.queues[chain]
+
+        batch = self.next_batch(chain, processed_tx)
+        if not batch:
+            return []
+
+        logger.info(f"📊 Checking {len(batch)} {chain.upper()} transactions...")
+        if backlog:
+            logger.info(f"⏳ {len(backlog)} {chain.upper()} matches queued, "
+                        f"oldest waiting {backlog.oldest_wait(now):.0f}s")
+
+        activities = []
+        for tx_hash, tx, direction in batch:
+            timestamp = tx.get("timestamp") or datetime.fromtimestamp(now or time.time()).isoformat()
+            block_number = tx.get("blockNumber", "unknown")
+
+            if direction == "outgoing":
+                logger.info(f"🚀 OUTGOING {chain.upper()} transaction detected!")
+                logger.info(f"   From: {wallet}")
+                logger.info(f"   To: {tx.get('to', 'unknown')}")
+            else:
+                logger.info(f"📨 INCOMING {chain.upper()} transaction detected!")
+                logger.info(f"   From: {tx.get('from', 'unknown')}")
+                logger.info(f"   To: {wallet}")
+
+            logger.info(f"   Block: {block_number}")
+            logger.info(f"   Time: {timestamp}")
+            logger.info(f"   Hash: {tx_hash[:20]}...")
+            fee = transaction_fee(tx) if self.fee_analytics is not None else None
+            if direction == "outgoing" and fee and self.fee_analytics.is_anomalous(chain, fee[2]):
+                logger.warning(f"💸 Fee {fee[2] / 10 ** 18:.6f} is above the {chain.upper()} p99")
+
+            if timestamp > (state.get("last_active") or ""):  # priority mode may emit out of order
+                state.set("last_active", timestamp)
+            activity_count.increment()
+            if self.histograms is not None:
+                self.histograms.record(chain, wallet, datetime.fromisoformat(timestamp).timestamp())
+            if direction == "outgoing" and self.cross_chain is not None:
+                self.observe_outgoing(chain, wallet, tx, logger)
+            activity = {
+                "chain": chain,
+                "wallet": wallet,
+                "direction": direction,
+                "hash": tx_hash,
+                "blockNumber": block_number,
+                "timestamp": timestamp
+            }
+            activities.append(activity)
+            if self.broadcaster is not None:
+                self.broadcaster.publish(activity)
+            if self.notify is not None:
+                self.notify(("owner",), dict(
+                    activity,
+                    event="activity",
+                    subject=f"{direction.capitalize()} {chain} transaction detected",
+                    text=f"{direction.capitalize()} {chain} transaction {tx_hash} in block {block_number} at {timestamp}"
+                ), f"activity:{chain}:{tx_hash}")
+
+            processed_tx.add(tx_hash)
+
+        state.flush()
+        return activities
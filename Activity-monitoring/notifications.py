@@ -0,0 +1,401 @@
+"""
+Notification fan-out for detected activity and approaching deadlines
+Detection code only calls notify(), which appends to an in-memory buffer and
+returns. A dispatcher running on its own thread and event loop moves that
+buffer into a persistent outbox in one transaction per loop iteration and
+delivers the outbox to webhook URLs (pooled keep-alive aiohttp session) and
+to email via an SMTP relay, so neither sqlite writes nor slow or failing
+receivers stall matching.
+
+- outbox: sqlite table, survives restarts; a notification claimed but not
+  finished when the process died is retried (at-least-once delivery)
+- batching: due notifications for the same destination go out as one
+  request / one email
+- concurrency: at most `per_destination` requests in flight per host
+- retry: exponential backoff with full jitter, permanent failures (4xx
+  other than 408/429) and exhausted attempts are marked dead
+"""
+
+import asyncio
+import json
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+from email.message import EmailMessage
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+except ImportError:  # only needed for webhook destinations
+    aiohttp = None
+
+
+class DeliveryError(Exception):
+    """A failed delivery; permanent failures are not retried"""
+
+    def __init__(self, message, permanent=False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+def destination_kind(destination):
+    if destination.startswith(("http://", "https://")):
+        return "webhook"
+    if destination.startswith("mailto:"):
+        return "email"
+    raise ValueError(f"unsupported notification destination: {destination}")
+
+
+def destination_host(destination):
+    """Concurrency limits apply per receiving host"""
+    if destination_kind(destination) == "email":
+        return "smtp"
+    return urlsplit(destination).netloc.lower()
+
+
+class Outbox:
+    """Persistent notification queue"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                destination TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                dedup_key TEXT UNIQUE,
+                created REAL NOT NULL,
+                next_attempt REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                last_error TEXT
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt)")
+        # Claimed by a process that died before finishing: deliver again
+        self._db.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+
+    def enqueue(self, destination, payload, dedup_key=None, now=None):
+        """Add a notification; returns False if dedup_key was already queued"""
+        return self.enqueue_many([(destination, payload, dedup_key)], now) == 1
+
+    def enqueue_many(self, notifications, now=None):
+        """
+        Add (destination, payload, dedup_key) tuples in one transaction
+        Returns how many were new; already queued dedup_keys are skipped
+        """
+        now = time.time() if now is None else now
+        rows = []
+        for destination, payload, dedup_key in notifications:
+            destination_kind(destination)
+            rows.append((destination, json.dumps(payload), dedup_key, now, now))
+        with self._lock:
+            before = self._db.total_changes
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO outbox (destination, payload, dedup_key, created, next_attempt) "
+                    "VALUES (?, ?, ?, ?, ?)", rows)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return self._db.total_changes - before
+
+    def claim_due(self, now=None, max_batch=50, exclude=(), limit=1000):
+        """
+        Claim due notifications grouped by destination
+        Returns {destination: [(id, attempts, payload), ...]} with at most
+        max_batch entries per destination, oldest first, and at most limit
+        rows overall; destinations in exclude are skipped
+        """
+        now = time.time() if now is None else now
+        exclude = list(exclude)
+        query = "SELECT id, destination, attempts, payload FROM outbox WHERE status = 'pending' AND next_attempt <= ?"
+        if exclude:
+            query += f" AND destination NOT IN ({','.join('?' * len(exclude))})"
+        query += " ORDER BY id LIMIT ?"
+        batches = {}
+        with self._lock:
+            rows = self._db.execute(query, [now, *exclude, limit]).fetchall()
+            claimed = []
+            for row_id, destination, attempts, payload in rows:
+                batch = batches.setdefault(destination, [])
+                if len(batch) >= max_batch:
+                    continue
+                batch.append((row_id, attempts, json.loads(payload)))
+                claimed.append((row_id,))
+            self._db.executemany("UPDATE outbox SET status = 'sending' WHERE id = ?", claimed)
+        return batches
+
+    def mark_sent(self, ids):
+        with self._lock:
+            self._db.executemany("UPDATE outbox SET status = 'sent', last_error = NULL WHERE id = ?",
+                                 [(row_id,) for row_id in ids])
+
+    def mark_failed(self, ids, error, next_attempt=None):
+        """Reschedule at next_attempt, or mark dead when next_attempt is None"""
+        with self._lock:
+            if next_attempt is None:
+                self._db.executemany(
+                    "UPDATE outbox SET status = 'dead', attempts = attempts + 1, last_error = ? WHERE id = ?",
+                    [(error, row_id) for row_id in ids])
+            else:
+                self._db.executemany(
+                    "UPDATE outbox SET status = 'pending', attempts = attempts + 1, next_attempt = ?, "
+                    "last_error = ? WHERE id = ?",
+                    [(next_attempt, error, row_id) for row_id in ids])
+
+    def next_due(self):
+        with self._lock:
+            row = self._db.execute("SELECT MIN(next_attempt) FROM outbox WHERE status = 'pending'").fetchone()
+        return row[0]
+
+    def purge(self, older_than):
+        """Drop sent notifications created before older_than"""
+        with self._lock:
+            self._db.execute("DELETE FROM outbox WHERE status = 'sent' AND created < ?", (older_than,))
+
+    def stats(self):
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class WebhookSender:
+    """POST a batch as JSON over a shared keep-alive connection pool"""
+
+    def __init__(self, timeout=10, pool_size=100, headers=None):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.headers = headers or {}
+        self._session = None
+
+    async def send(self, destination, notifications):
+        if aiohttp is None:
+            raise DeliveryError("aiohttp is required for webhook notifications", permanent=True)
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=self.headers)
+        try:
+            async with self._session.post(destination, json={"notifications": notifications}) as response:
+                await response.read()
+                if response.status >= 400:
+                    permanent = response.status < 500 and response.status not in (408, 429)
+                    raise DeliveryError(f"HTTP {response.status}", permanent=permanent)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise DeliveryError(f"{type(e).__name__}: {e}")
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class SmtpSender:
+    """Send a batch as one email through an SMTP relay (blocking I/O runs in a thread)"""
+
+    def __init__(self, host, port=587, sender="monitor@localhost", username=None, password=None,
+                 starttls=True, timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def _send(self, recipient, notifications):
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = recipient
+        message["Subject"] = (notifications[0].get("subject") if len(notifications) == 1
+                              else f"{len(notifications)} wallet monitor notifications")
+        message.set_content("\n\n".join(n.get("text") or json.dumps(n, indent=2) for n in notifications))
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+                if self.starttls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password)
+                smtp.send_message(message)
+        except smtplib.SMTPRecipientsRefused as e:
+            raise DeliveryError(f"recipient refused: {e}", permanent=True)
+        except (smtplib.SMTPException, OSError) as e:
+            raise DeliveryError(f"{type(e).__name__}: {e}")
+
+    async def send(self, destination, notifications):
+        recipient = destination[len("mailto:"):]
+        await asyncio.get_running_loop().run_in_executor(None, self._send, recipient, notifications)
+
+    async def close(self):
+        pass
+
+
+class NotificationDispatcher:
+    """
+    Delivers the outbox in the background
+
+    notify() is safe to call from any thread and only touches memory; its
+    notifications reach the outbox on the dispatcher's next loop iteration
+    (or flush()). The delivery loop runs in its own daemon thread until
+    stop(), which flushes whatever is still buffered.
+    """
+
+    def __init__(self, outbox, senders, per_destination=2, max_batch=50, claim_limit=1000,
+                 poll_interval=5, base_backoff=2, max_backoff=600, max_attempts=10,
+                 retain_sent=7 * 24 * 3600):
+        self.outbox = outbox
+        self.senders = senders
+        self.per_destination = per_destination
+        self.max_batch = max_batch
+        self.claim_limit = claim_limit
+        self.poll_interval = poll_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.retain_sent = retain_sent
+        self._semaphores = {}
+        self._inflight = set()
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._loop = None
+        self._wakeup = None
+        self._thread = None
+        self._stopping = False
+        self.delivered = 0
+        self.failed = 0
+
+    def notify(self, destinations, payload, dedup_key=None):
+        """Hand payload over for every destination; returns how many were buffered"""
+        notifications = []
+        for destination in destinations:
+            destination_kind(destination)
+            notifications.append((destination, payload, f"{dedup_key}|{destination}" if dedup_key else None))
+        if notifications:
+            with self._pending_lock:
+                self._pending.extend(notifications)
+            self._wake()
+        return len(notifications)
+
+    def flush(self):
+        """Move buffered notifications into the outbox; returns how many were newly queued"""
+        with self._pending_lock:
+            notifications, self._pending = self._pending, []
+        if not notifications:
+            return 0
+        return self.outbox.enqueue_many(notifications)
+
+    def _wake(self):
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def backoff(self, attempts):
+        """Full jitter: uniform in [0, min(max_backoff, base * 2^attempts)]"""
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempts))
+
+    # ---- delivery loop ----
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_thread, name="notifications", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        self._stopping = True
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run_thread(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self.run())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def run(self):
+        self._wakeup = asyncio.Event()
+        tasks = set()
+        last_purge = 0
+        try:
+            while not self._stopping:
+                self._wakeup.clear()
+                self.flush()
+                batches = self.outbox.claim_due(max_batch=self.max_batch, exclude=self._inflight,
+                                                limit=self.claim_limit)
+                for destination, batch in batches.items():
+                    self._inflight.add(destination)
+                    task = asyncio.ensure_future(self._deliver(destination, batch))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+                now = time.time()
+                if now - last_purge > 3600:
+                    self.outbox.purge(now - self.retain_sent)
+                    last_purge = now
+
+                # Anything due now was claimed, is past claim_limit or belongs
+                # to an in-flight destination; a completion sets the wakeup event
+                next_due = self.outbox.next_due()
+                wait = self.poll_interval
+                if next_due is not None and next_due > now:
+                    wait = min(wait, next_due - now)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            self.flush()
+            for sender in self.senders.values():
+                await sender.close()
+
+    async def _deliver(self, destination, batch):
+        host = destination_host(destination)
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.per_destination)
+        ids = [row_id for row_id, _, _ in batch]
+        try:
+            sender = self.senders.get(destination_kind(destination))
+            if sender is None:
+                raise DeliveryError(f"no sender configured for {destination}", permanent=True)
+            async with semaphore:
+                await sender.send(destination, [payload for _, _, payload in batch])
+        except Exception as e:
+            self.failed += len(ids)
+            attempts = max(attempts for _, attempts, _ in batch) + 1
+            permanent = isinstance(e, DeliveryError) and e.permanent
+            if permanent or attempts >= self.max_attempts:
+                self.outbox.mark_failed(ids, str(e))
+                print(f"❌ Notification to {destination} dropped after {attempts} attempt(s): {e}")
+            else:
+                self.outbox.mark_failed(ids, str(e), time.time() + self.backoff(attempts))
+        else:
+            self.delivered += len(ids)
+            self.outbox.mark_sent(ids)
+        finally:
+            self._inflight.discard(destination)
+            self._wakeup.set()
+
+    def stats(self):
+        return {
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "outbox": self.outbox.stats()
+        }
@@ -0,0 +1,83 @@
+"""
+Deadline-priority ordering for backlogged receipts
+After a burst or a backfill the matcher can have far more receipts queued
+than it handles in one tick. DeadlineQueue serves them earliest deadline
+first: a matched receipt's deadline is when the affected lock becomes
+releasable (lastActivityTime + inactivityPeriod), so the most urgent proof
+of activity is emitted before everything else.
+
+Deadlines are clamped to [enqueue time, enqueue time + horizon]. Irrelevant
+receipts get the full horizon, which ages them: once a receipt has waited
+`horizon` seconds no newly queued receipt can be ordered before it, so
+nothing starves.
+"""
+
+import heapq
+import threading
+import time
+
+
+def lock_remaining(last_activity, inactivity_period, now=None):
+    """Seconds until a lock becomes releasable (negative once it is)"""
+    now = time.time() if now is None else now
+    return last_activity + inactivity_period - now
+
+
+class DeadlineQueue:
+    """Earliest-deadline-first queue of unique keys with bounded waiting"""
+
+    def __init__(self, horizon=3600):
+        self.horizon = horizon
+        self._heap = []
+        self._keys = set()
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def push(self, key, item, remaining=None, now=None):
+        """
+        Queue item under key unless it is already queued
+        remaining: seconds until the affected lock's deadline, None for
+        receipts that affect no lock
+        """
+        now = time.time() if now is None else now
+        slack = self.horizon if remaining is None else min(max(remaining, 0), self.horizon)
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            heapq.heappush(self._heap, (now + slack, self._seq, now, key, item))
+            self._seq += 1
+            return True
+
+    def pop(self):
+        """(key, item, seconds waited) of the most urgent entry, or None"""
+        with self._lock:
+            if not self._heap:
+                return None
+            _, _, enqueued, key, item = heapq.heappop(self._heap)
+            self._keys.discard(key)
+        return key, item, time.time() - enqueued
+
+    def drain(self, budget):
+        """Pop up to budget entries in priority order"""
+        entries = []
+        while len(entries) < budget:
+            entry = self.pop()
+            if entry is None:
+                break
+            entries.append(entry)
+        return entries
+
+    def oldest_wait(self, now=None):
+        """Seconds the longest-waiting entry has been queued"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if not self._heap:
+                return 0
+            return now - min(entry[2] for entry in self._heap)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._heap)
@@ -0,0 +1,304 @@
+"""
+On-demand profiling for the running monitor
+Admin endpoints to sample the CPU, snapshot memory and dump stacks of a live
+process without restarting it. Routes are only registered when
+MONITOR_ADMIN_ENABLED is set and MONITOR_ADMIN_TOKEN holds the token every
+request must send; when disabled nothing is imported, started or hooked, so
+there is no overhead.
+
+Artifacts (written to MONITOR_ADMIN_DIR, default "profiles/"):
+- cpu-*.pstats: marshal'd profile readable by pstats.Stats / snakeviz
+- cpu-*.collapsed: "frame;frame;frame count" lines for flamegraph.pl /
+  speedscope
+- mem-*.tracemalloc: tracemalloc.Snapshot.dump() files
+- stacks-*.txt: thread and asyncio task stacks
+"""
+
+import asyncio
+import hmac
+import marshal
+import os
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from collections import Counter
+
+# Bounds of /admin/profile/cpu/start: faster sampling would mostly profile the
+# sampler, and a forgotten profile must not run for hours
+MIN_SAMPLE_INTERVAL = 0.001
+MAX_PROFILE_SECONDS = 600
+
+
+def _frame_key(code):
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+def _label(key):
+    filename, line, name = key
+    return f"{os.path.basename(filename)}:{name}:{line}"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler over sys._current_frames()
+
+    A background thread records the stack of every other thread every
+    `interval` seconds. The profiled code is not instrumented, so overhead
+    is bounded by the sampling rate and disappears when stopped.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()  # (thread name, frame keys root -> leaf) -> samples
+        self.samples = 0
+        self.started = None
+        self.duration = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds=None):
+        if self.running:
+            raise RuntimeError("profiler already running")
+        self._stop.clear()
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, args=(seconds,), name="sampling_profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self, seconds):
+        own = threading.get_ident()
+        deadline = None if seconds is None else time.monotonic() + seconds
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                keys = []
+                while frame is not None:
+                    keys.append(_frame_key(frame.f_code))
+                    frame = frame.f_back
+                keys.reverse()
+                self.stacks[(names.get(ident, str(ident)), tuple(keys))] += 1
+            self.samples += 1
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        self.duration = time.time() - self.started
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed stack format, one line per unique stack"""
+        lines = []
+        for (thread, keys), count in self.stacks.most_common():
+            lines.append(";".join([thread] + [_label(key) for key in keys]) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+    def pstats_dict(self):
+        """
+        Build the dict pstats.Stats loads:
+        {func: (primitive calls, calls, self time, cumulative time, callers)}
+        Sample counts stand in for calls; times are samples * interval
+        """
+        self_samples = Counter()
+        cumulative = Counter()
+        callers = {}
+        for (_, keys), count in self.stacks.items():
+            if not keys:
+                continue
+            self_samples[keys[-1]] += count
+            for key in set(keys):  # count recursive frames once
+                cumulative[key] += count
+            for caller, callee in set(zip(keys, keys[1:])):
+                edges = callers.setdefault(callee, Counter())
+                edges[caller] += count
+
+        stats = {}
+        for key, count in cumulative.items():
+            edges = {
+                caller: (n, n, n * self.interval, n * self.interval)
+                for caller, n in callers.get(key, {}).items()
+            }
+            stats[key] = (count, count, self_samples[key] * self.interval, count * self.interval, edges)
+        return stats
+
+    def write(self, directory, name):
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, name)
+        with open(base + ".pstats", "wb") as f:
+            marshal.dump(self.pstats_dict(), f)
+        with open(base + ".collapsed", "w") as f:
+            f.write(self.collapsed())
+        return [base + ".pstats", base + ".collapsed"]
+
+
+class MemorySnapshots:
+    """Named tracemalloc snapshots, kept on disk"""
+
+    def __init__(self, directory, frames=25):
+        self.directory = directory
+        self.frames = frames
+        self.snapshots = []
+
+    def take(self):
+        """Snapshot current allocations (starting tracemalloc on first use)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        os.makedirs(self.directory, exist_ok=True)
+        name = time.strftime("mem-%Y%m%d-%H%M%S") + f"-{len(self.snapshots)}"
+        path = os.path.join(self.directory, name + ".tracemalloc")
+        snapshot.dump(path)
+        self.snapshots.append(name)
+        return name, path, snapshot
+
+    def load(self, name):
+        return tracemalloc.Snapshot.load(os.path.join(self.directory, name + ".tracemalloc"))
+
+    def stop(self):
+        """Stop tracing; snapshot files stay on disk"""
+        tracemalloc.stop()
+
+
+def top_stats(stats, limit):
+    return [
+        {"location": str(stat.traceback[0]) if stat.traceback else "?",
+         "size_kb": round(stat.size / 1024, 1),
+         "count": stat.count,
+         **({"size_diff_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff}
+            if hasattr(stat, "size_diff") else {})}
+        for stat in stats[:limit]
+    ]
+
+
+def dump_stacks(loop=None):
+    """Text dump of every thread stack plus the asyncio tasks of loop"""
+    names = {thread.ident: thread for thread in threading.enumerate()}
+    out = []
+    for ident, frame in sys._current_frames().items():
+        thread = names.get(ident)
+        label = f"{thread.name} (daemon)" if thread is not None and thread.daemon else (thread.name if thread else "?")
+        out.append(f"--- Thread {label} [{ident}] ---")
+        out.extend(line.rstrip("\n") for line in traceback.format_stack(frame))
+    if loop is not None:
+        tasks = asyncio.all_tasks(loop)
+        out.append(f"=== {len(tasks)} asyncio task(s) ===")
+        for task in tasks:
+            out.append(f"--- {task.get_name()}: {task.get_coro()!r} ---")
+            for frame in task.get_stack():
+                out.extend(line.rstrip("\n") for line in traceback.format_stack(frame, limit=1))
+    return "\n".join(out) + "\n"
+
+
+def register_admin_routes(app, token, directory="profiles"):
+    """
+    Add /admin/* profiling routes to a FastAPI app
+    Requests must send token in the X-Admin-Token header
+    """
+    if not token:
+        raise ValueError("admin routes require a token")
+    from fastapi import Depends, Header, HTTPException
+
+    profiler = {"current": None, "timer": None, "loop": None}
+    profiler_lock = threading.Lock()  # the timer and /stop may finish concurrently
+    memory = MemorySnapshots(directory)
+
+    def check_token(x_admin_token: str = Header(None)):
+        if x_admin_token is None or not hmac.compare_digest(x_admin_token, token):
+            raise HTTPException(status_code=403, detail="invalid admin token")
+
+    def finish_cpu_profile():
+        """Stop and write the running profile once; runs in an executor thread"""
+        with profiler_lock:
+            current, timer = profiler["current"], profiler["timer"]
+            if current is None:
+                return None
+            profiler["current"] = profiler["timer"] = None
+        if timer is not None:
+            profiler["loop"].call_soon_threadsafe(timer.cancel)
+        current.stop()
+        name = time.strftime("cpu-%Y%m%d-%H%M%S", time.localtime(current.started))
+        files = current.write(directory, name)
+        print(f"🔬 CPU profile: {current.samples} samples over {current.duration:.1f}s -> {files[0]}")
+        return {"samples": current.samples, "duration_s": current.duration, "files": files}
+
+    @app.post("/admin/profile/cpu/start", dependencies=[Depends(check_token)])
+    async def start_cpu_profile(seconds: float = 30, interval: float = 0.005):
+        if not 0 < seconds <= MAX_PROFILE_SECONDS:
+            raise HTTPException(status_code=400, detail=f"seconds must be in (0, {MAX_PROFILE_SECONDS}]")
+        if not interval >= MIN_SAMPLE_INTERVAL:
+            interval = MIN_SAMPLE_INTERVAL
+        loop = asyncio.get_running_loop()
+        with profiler_lock:
+            if profiler["current"] is not None:
+                raise HTTPException(status_code=409, detail="a CPU profile is already running")
+            current = profiler["current"] = SamplingProfiler(interval)
+            current.start(seconds)
+            # Write the artifacts when the window ends even if nobody calls stop
+            profiler["loop"] = loop
+            profiler["timer"] = loop.call_later(
+                seconds, lambda: loop.run_in_executor(None, finish_cpu_profile))
+        return {"status": "started", "seconds": seconds, "interval": interval}
+
+    @app.post("/admin/profile/cpu/stop", dependencies=[Depends(check_token)])
+    async def stop_cpu_profile():
+        result = await asyncio.get_running_loop().run_in_executor(None, finish_cpu_profile)
+        if result is None:
+            raise HTTPException(status_code=404, detail="no CPU profile running")
+        return result
+
+    @app.post("/admin/memory/snapshot", dependencies=[Depends(check_token)])
+    async def memory_snapshot(limit: int = 20):
+        def take():
+            name, path, snapshot = memory.take()
+            return {"name": name, "file": path,
+                    "top": top_stats(snapshot.statistics("lineno"), limit)}
+
+        # Snapshotting and grouping every traced block takes seconds on a
+        # big heap; keep it off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, take)
+
+    @app.get("/admin/memory/diff", dependencies=[Depends(check_token)])
+    async def memory_diff(base: str = None, current: str = None, limit: int = 20):
+        """Compare two snapshots (default: the last two taken)"""
+        if base is None or current is None:
+            if len(memory.snapshots) < 2:
+                raise HTTPException(status_code=400, detail="take two snapshots or name base and current")
+            base, current = base or memory.snapshots[-2], current or memory.snapshots[-1]
+        # Only names this process wrote; anything else never reaches the filesystem
+        if base not in memory.snapshots or current not in memory.snapshots:
+            raise HTTPException(status_code=404, detail="unknown snapshot")
+
+        def compare():
+            old, new = memory.load(base), memory.load(current)
+            return top_stats(new.compare_to(old, "lineno"), limit)
+
+        try:
+            top = await asyncio.get_running_loop().run_in_executor(None, compare)
+        except OSError:
+            raise HTTPException(status_code=404, detail="unknown snapshot")
+        return {"base": base, "current": current, "top": top}
+
+    @app.post("/admin/memory/stop", dependencies=[Depends(check_token)])
+    async def memory_stop():
+        await asyncio.get_running_loop().run_in_executor(None, memory.stop)
+        return {"status": "stopped", "snapshots": memory.snapshots}
+
+    @app.get("/admin/stacks", dependencies=[Depends(check_token)])
+    async def stacks():
+        text = dump_stacks(asyncio.get_running_loop())
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, time.strftime("stacks-%Y%m%d-%H%M%S.txt"))
+        with open(path, "w") as f:
+            f.write(text)
+        return {"file": path, "stacks": text}
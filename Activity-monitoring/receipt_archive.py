@@ -0,0 +1,335 @@
+"""
+Tiered receipt archive
+Keeps the history of stored transactions beyond the 100-entry working files:
+
+- hot:  the active segment, held in memory and journaled to an uncompressed
+        JSON-lines file so a crash does not lose it
+- warm: sealed segments, compressed with zstd when the zstandard package is
+        installed and gzip otherwise
+
+A segment is sealed once it reaches segment_max_bytes or segment_max_age
+seconds. Every sealed segment gets a sparse index entry (block range per
+chain, arrival time range and a bloom filter of the wallets it touches) so
+historical queries only decompress the segments that can match. Disk use is
+bounded by retention_days and max_total_bytes.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+JOURNAL_FILE = "active.jsonl"
+INDEX_FILE = "index.json"
+
+
+class WalletBloom:
+    """Small bloom filter over lowercase wallet addresses"""
+
+    def __init__(self, size_bits, num_hashes, bits=0):
+        self.size_bits = size_bits
+        self.num_hashes = num_hashes
+        self.bits = bits
+
+    @classmethod
+    def for_wallets(cls, wallets, false_positive_rate=0.01):
+        n = max(len(wallets), 1)
+        size_bits = max(64, int(math.ceil(-n * math.log(false_positive_rate) / (math.log(2) ** 2))))
+        num_hashes = max(1, int(round(size_bits / n * math.log(2))))
+        bloom = cls(size_bits, num_hashes)
+        for wallet in wallets:
+            bloom.add(wallet)
+        return bloom
+
+    def _positions(self, wallet):
+        digest = hashlib.blake2b(wallet.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.size_bits
+
+    def add(self, wallet):
+        for position in self._positions(wallet):
+            self.bits |= 1 << position
+
+    def __contains__(self, wallet):
+        return all(self.bits >> position & 1 for position in self._positions(wallet))
+
+    def to_dict(self):
+        raw = self.bits.to_bytes((self.size_bits + 7) // 8, "little")
+        return {"m": self.size_bits, "k": self.num_hashes, "bits": base64.b64encode(raw).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data):
+        bits = int.from_bytes(base64.b64decode(data["bits"]), "little")
+        return cls(data["m"], data["k"], bits)
+
+
+def _block_int(value):
+    try:
+        return int(value, 16) if isinstance(value, str) else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _arrival_time(tx):
+    try:
+        return datetime.fromisoformat(tx["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time()
+
+
+def _tx_wallets(tx):
+    return {address.lower() for address in (tx.get("from"), tx.get("to")) if address}
+
+
+class ReceiptArchive:
+    """
+    Append-only, queryable transaction history with bounded disk use
+    """
+
+    def __init__(self, directory, segment_max_bytes=8 * 1024 * 1024, segment_max_age=3600,
+                 retention_days=90, max_total_bytes=2 * 1024 * 1024 * 1024):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_age = segment_max_age
+        self.retention_days = retention_days
+        self.max_total_bytes = max_total_bytes
+        self.codec = "zstd" if zstandard is not None else "gzip"
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index = self._load_index()
+        self._journal = None
+        self._reset_hot()
+        self._recover_journal()
+
+    # ---- writing ----
+
+    def append(self, chain, transactions):
+        """Archive a batch of extracted transactions for one chain"""
+        if not transactions:
+            return
+        with self._lock:
+            if self._journal is None:
+                self._journal = open(self._journal_path(), "a", encoding="utf-8")
+            for tx in transactions:
+                record = {"chain": chain, "tx": tx}
+                line = json.dumps(record, separators=(",", ":")) + "\n"
+                self._journal.write(line)
+                self._add_hot(record, len(line))
+            self._journal.flush()
+            if self._hot_bytes >= self.segment_max_bytes or \
+                    time.time() - self._hot_started >= self.segment_max_age:
+                self._seal()
+
+    def flush(self):
+        """Seal the active segment, e.g. on shutdown"""
+        with self._lock:
+            self._seal()
+
+    def _add_hot(self, record, size):
+        tx = record["tx"]
+        chain = record["chain"]
+        self._hot.append(record)
+        self._hot_bytes += size
+        self._hot_wallets.update(_tx_wallets(tx))
+        ts = _arrival_time(tx)
+        self._hot_min_ts = min(self._hot_min_ts, ts)
+        self._hot_max_ts = max(self._hot_max_ts, ts)
+        block = _block_int(tx.get("blockNumber"))
+        if block is not None:
+            low, high = self._hot_blocks.get(chain, (block, block))
+            self._hot_blocks[chain] = (min(low, block), max(high, block))
+
+    def _reset_hot(self):
+        self._hot = []
+        self._hot_bytes = 0
+        self._hot_started = time.time()
+        self._hot_wallets = set()
+        self._hot_blocks = {}
+        self._hot_min_ts = math.inf
+        self._hot_max_ts = -math.inf
+
+    def _seal(self):
+        if not self._hot:
+            return
+        name = f"segment-{time.time_ns()}"
+        name += ".jsonl.zst" if self.codec == "zstd" else ".jsonl.gz"
+        payload = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in self._hot)
+        path = os.path.join(self.directory, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_compress(payload.encode("utf-8"), self.codec))
+        os.replace(tmp_path, path)
+
+        self._index.append({
+            "file": name,
+            "codec": self.codec,
+            "count": len(self._hot),
+            "bytes": os.path.getsize(path),
+            "min_ts": self._hot_min_ts,
+            "max_ts": self._hot_max_ts,
+            "blocks": {chain: list(bounds) for chain, bounds in self._hot_blocks.items()},
+            "wallets": WalletBloom.for_wallets(self._hot_wallets).to_dict()
+        })
+        self._enforce_retention()
+        self._save_index()
+
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.exists(self._journal_path()):
+            os.remove(self._journal_path())
+        self._reset_hot()
+
+    def _recover_journal(self):
+        """Reload the hot tier after a restart and seal it"""
+        if not os.path.exists(self._journal_path()):
+            return
+        with open(self._journal_path(), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._add_hot(json.loads(line), len(line))
+                except ValueError:
+                    break  # torn final write
+        self._seal()
+
+    def _enforce_retention(self):
+        cutoff = time.time() - self.retention_days * 86400
+        total = sum(entry["bytes"] for entry in self._index)
+        while self._index and (self._index[0]["max_ts"] < cutoff or total > self.max_total_bytes):
+            entry = self._index.pop(0)
+            total -= entry["bytes"]
+            try:
+                os.remove(os.path.join(self.directory, entry["file"]))
+            except OSError:
+                pass
+
+    # ---- reading ----
+
+    def query(self, wallet=None, chain=None, since=None, until=None, from_block=None, to_block=None):
+        """
+        Return archived {"chain", "tx"} records matching every given filter
+        since/until are unix timestamps; block bounds apply per chain
+        """
+        wallet = wallet.lower() if wallet else None
+        with self._lock:
+            segments = [entry for entry in self._index
+                        if self._segment_may_match(entry, wallet, chain, since, until, from_block, to_block)]
+            hot = list(self._hot)
+
+        results = []
+        for entry in segments:
+            for record in self._read_segment(entry):
+                if self._record_matches(record, wallet, chain, since, until, from_block, to_block):
+                    results.append(record)
+        for record in hot:
+            if self._record_matches(record, wallet, chain, since, until, from_block, to_block):
+                results.append(record)
+        return results
+
+    def wallet_activity(self, wallet, days=90):
+        """All archived activity for a wallet in the last N days"""
+        return self.query(wallet=wallet, since=time.time() - days * 86400)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "codec": self.codec,
+                "warm_segments": len(self._index),
+                "warm_records": sum(entry["count"] for entry in self._index),
+                "warm_bytes": sum(entry["bytes"] for entry in self._index),
+                "hot_records": len(self._hot),
+                "hot_bytes": self._hot_bytes
+            }
+
+    @staticmethod
+    def _segment_may_match(entry, wallet, chain, since, until, from_block, to_block):
+        if since is not None and entry["max_ts"] < since:
+            return False
+        if until is not None and entry["min_ts"] > until:
+            return False
+        if chain is not None and chain not in entry["blocks"]:
+            return False
+        if from_block is not None or to_block is not None:
+            ranges = [entry["blocks"][chain]] if chain is not None else list(entry["blocks"].values())
+            if not any((from_block is None or high >= from_block) and (to_block is None or low <= to_block)
+                       for low, high in ranges):
+                return False
+        if wallet is not None and wallet not in WalletBloom.from_dict(entry["wallets"]):
+            return False
+        return True
+
+    @staticmethod
+    def _record_matches(record, wallet, chain, since, until, from_block, to_block):
+        tx = record["tx"]
+        if chain is not None and record["chain"] != chain:
+            return False
+        if wallet is not None and wallet not in _tx_wallets(tx):
+            return False
+        if since is not None or until is not None:
+            ts = _arrival_time(tx)
+            if (since is not None and ts < since) or (until is not None and ts > until):
+                return False
+        if from_block is not None or to_block is not None:
+            block = _block_int(tx.get("blockNumber"))
+            if block is None:
+                return False
+            if (from_block is not None and block < from_block) or (to_block is not None and block > to_block):
+                return False
+        return True
+
+    def _read_segment(self, entry):
+        path = os.path.join(self.directory, entry["file"])
+        try:
+            with open(path, "rb") as f:
+                payload = _decompress(f.read(), entry["codec"])
+        except OSError:
+            return []  # removed by retention while the query was running
+        return [json.loads(line) for line in payload.decode("utf-8").splitlines() if line]
+
+    # ---- index ----
+
+    def _journal_path(self):
+        return os.path.join(self.directory, JOURNAL_FILE)
+
+    def _load_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    return json.load(f)
+            except ValueError:
+                pass
+        return []
+
+    def _save_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, path)
+
+
+def _compress(data, codec):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data, codec):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd segments")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
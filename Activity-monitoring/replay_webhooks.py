@@ -0,0 +1,216 @@
+"""
+Replay recorded webhook traffic through the ingestion and matching pipeline
+Reads an archive written by the webhook server (WEBHOOK_ARCHIVE_DIR), feeds
+every delivery with its recorded headers through the same MonitorPipeline the
+server uses (dedup index, working files, matching queues, agent ticks) in a
+scratch directory, and reports throughput and any divergence in the detected
+wallet activity against a saved baseline.
+
+Usage:
+    python replay_webhooks.py ARCHIVE [--speed 1|N|max] [--save-baseline FILE] [--baseline FILE]
+                              [--priority] [--batch-size N] [--verbose]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from chain_config import CHAIN_CONFIG
+from coalescing_storage import CoalescingStorage
+from cross_chain_activity import CrossChainActivityMerger
+from fee_analytics import FeeAnalytics
+from activity_histograms import ActivityHistograms
+from ingest_dedup import IdempotencyIndex
+from monitor_pipeline import MonitorPipeline
+from webhook_archive import iter_deliveries
+
+# The agents' check_wallet_activity interval
+TICK_SECONDS = 5
+
+logger = logging.getLogger("replay_webhooks")
+
+
+async def body_chunks(body, size=64 * 1024):
+    data = body.encode("utf-8")
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def sandbox_pipeline(directory, priority=False, batch_size=200, horizon=3600,
+                     inactivity_period=0, verbose=False):
+    """
+    A MonitorPipeline like the server's, with every file under directory
+    Returns (pipeline, {chain: CoalescingStorage})
+    """
+    chains = {chain: dict(config, file=os.path.join(directory, os.path.basename(config["file"])))
+              for chain, config in CHAIN_CONFIG.items()}
+    pipeline = MonitorPipeline(
+        chains,
+        IdempotencyIndex(os.path.join(directory, "ingest_index"),
+                         retain_blocks={chain: config["finality_blocks"] for chain, config in CHAIN_CONFIG.items()}),
+        cross_chain=CrossChainActivityMerger(
+            confirmations={chain: config["confirmations"] for chain, config in CHAIN_CONFIG.items()}),
+        fee_analytics=FeeAnalytics(),
+        histograms=ActivityHistograms(),
+        priority=priority,
+        inactivity_period=inactivity_period,
+        batch_size=batch_size,
+        horizon=horizon,
+        log=print if verbose else (lambda message: None)
+    )
+    states = {chain: CoalescingStorage(os.path.join(directory, f"{chain}_monitor_state.json"))
+              for chain in chains}
+    return pipeline, states
+
+
+def replay(archive_path, speed=None, **pipeline_options):
+    """
+    Replay an archive and return (activities, stats)
+    speed=None replays as fast as possible, otherwise recorded gaps between
+    deliveries are divided by speed. Agent ticks run every TICK_SECONDS of
+    recorded time; whatever is still queued after the last delivery is
+    drained by further ticks.
+    """
+    with tempfile.TemporaryDirectory(prefix="replay-") as directory:
+        pipeline, states = sandbox_pipeline(directory, **pipeline_options)
+        return asyncio.run(_replay(archive_path, speed, pipeline, states))
+
+
+async def _replay(archive_path, speed, pipeline, states):
+    activities = []
+    deliveries = receipts = duplicates = errors = ticks = 0
+    first_recorded = None
+    next_tick = None
+    started = time.perf_counter()
+
+    def run_ticks(until):
+        nonlocal next_tick, ticks
+        while next_tick <= until:
+            for chain, state in states.items():
+                activities.extend(pipeline.process(chain, state, logger, now=next_tick))
+            next_tick += TICK_SECONDS
+            ticks += 1
+
+    for received_at, headers, body in iter_deliveries(archive_path):
+        if first_recorded is None:
+            first_recorded = received_at
+            next_tick = received_at + TICK_SECONDS
+        if speed is not None:
+            due = (received_at - first_recorded) / speed
+            delay = due - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        run_ticks(received_at)
+        deliveries += 1
+        result = await pipeline.ingest(body_chunks(body), headers, received_at)
+        if result["status"] != "ok":
+            errors += 1
+        elif result.get("duplicate"):
+            duplicates += 1
+        else:
+            receipts += result["transactions_stored"]
+
+    while next_tick is not None and any(pipeline.queues.values()):
+        run_ticks(next_tick)
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "deliveries": deliveries,
+        "receipts": receipts,
+        "duplicates": duplicates,
+        "errors": errors,
+        "ticks": ticks,
+        "activities": len(activities),
+        "elapsed_s": elapsed,
+        "deliveries_per_s": deliveries / elapsed if elapsed > 0 else 0.0,
+        "receipts_per_s": receipts / elapsed if elapsed > 0 else 0.0
+    }
+    return activities, stats
+
+
+def diff_activities(baseline, activities):
+    """Compare detected activity against a baseline run"""
+    def key(activity):
+        return activity["chain"], activity["hash"], activity["direction"]
+
+    expected = [key(a) for a in baseline]
+    actual = [key(a) for a in activities]
+    expected_set, actual_set = set(expected), set(actual)
+    return {
+        "missing": sorted(expected_set - actual_set),
+        "unexpected": sorted(actual_set - expected_set),
+        "order_changed": expected != actual and expected_set == actual_set
+    }
+
+
+def parse_speed(value):
+    if value == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded webhook traffic")
+    parser.add_argument("archive", help="archive directory or single segment file")
+    parser.add_argument("--speed", type=parse_speed, default=None,
+                        help="1 for real time, N for N times faster, max (default) for no delays")
+    parser.add_argument("--save-baseline", help="write detected activity to this file")
+    parser.add_argument("--baseline", help="compare detected activity with this file")
+    # Defaults follow the server's environment so a replay matches the live run
+    parser.add_argument("--priority", action="store_true", default=bool(os.environ.get("PRIORITY_MATCHING")),
+                        help="deadline-priority matching (PRIORITY_MATCHING)")
+    parser.add_argument("--batch-size", type=int, default=int(os.environ.get("MATCH_BATCH_SIZE", "200")),
+                        help="matches reported per agent tick with --priority (MATCH_BATCH_SIZE)")
+    parser.add_argument("--verbose", action="store_true", help="show the server and agent log output")
+    args = parser.parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    activities, stats = replay(
+        args.archive, args.speed,
+        priority=args.priority,
+        batch_size=args.batch_size,
+        horizon=int(os.environ.get("PRIORITY_HORIZON", "3600")),
+        inactivity_period=int(os.environ.get("INACTIVITY_PERIOD", "0")),
+        verbose=args.verbose
+    )
+
+    print(f"📼 Replayed {stats['deliveries']} deliveries / {stats['receipts']} receipts "
+          f"in {stats['elapsed_s']:.3f}s ({stats['ticks']} agent ticks)")
+    print(f"⚡ {stats['deliveries_per_s']:.1f} deliveries/s | {stats['receipts_per_s']:.1f} receipts/s")
+    print(f"🎯 Activities detected: {stats['activities']} | Duplicate deliveries: {stats['duplicates']} | "
+          f"Failed deliveries: {stats['errors']}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(activities, f, indent=2)
+        print(f"💾 Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        divergence = diff_activities(baseline, activities)
+        if divergence["missing"] or divergence["unexpected"] or divergence["order_changed"]:
+            print("❌ Detected activity diverges from baseline")
+            for item in divergence["missing"]:
+                print(f"   missing:    {item}")
+            for item in divergence["unexpected"]:
+                print(f"   unexpected: {item}")
+            if divergence["order_changed"]:
+                print("   same activities, different order")
+            return 1
+        print("✅ Detected activity matches baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,36 +3,45 @@ Multi-Chain Activity Monitor - Clean Version
 Based on working Sepolia setup, runs all chains through one webhook endpoint
 """
 
-from fastapi import FastAPI, Request
-import json
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
 import os
+import time
 from datetime import datetime
 from uagents import Agent, Context
 import uvicorn
 import threading
-import time
+
+from chain_config import CHAIN_CONFIG, MONITORED_WALLET
+from ingest_dedup import IdempotencyIndex
+from monitor_pipeline import MonitorPipeline
+from webhook_archive import WebhookArchive
+from receipt_archive import ReceiptArchive
+from activity_histograms import ActivityHistograms, DAY
+from activity_stream import ActivityBroadcaster, parse_filter
+from fee_analytics import FeeAnalytics
+from uea_identity import UEAResolver, HttpJsonRpcTransport
+from cross_chain_activity import BlockTimestamps, CrossChainActivityMerger
+from coalescing_storage import CoalescingStorage
+from notifications import NotificationDispatcher, Outbox, SmtpSender, WebhookSender
 
 # Create FastAPI app
 app = FastAPI()
 
-# Configuration for all chains
-CHAIN_CONFIG = {
-    "sepolia": {
-        "file": "sepolia_transactions.json", 
-        "wallet": "0xdB630944101765cfb1f6836AE7579Eee1cdBbCBC",
-        "port": 8001
-    },
-    "bnb": {
-        "file": "bnb_transactions.json", 
-        "wallet": "0xdB630944101765cfb1f6836AE7579Eee1cdBbCBC",
-        "port": 8002
-    },
-    "optimism": {
-        "file": "optimism_transactions.json", 
-        "wallet": "0xdB630944101765cfb1f6836AE7579Eee1cdBbCBC",
-        "port": 8003
-    }
-}
+# Set WEBHOOK_ARCHIVE_DIR to record raw webhook bodies for replay_webhooks.py
+WEBHOOK_ARCHIVE_DIR = os.environ.get("WEBHOOK_ARCHIVE_DIR")
+webhook_archive = WebhookArchive(WEBHOOK_ARCHIVE_DIR) if WEBHOOK_ARCHIVE_DIR else None
+
+# Remembers ingested deliveries/receipts so provider redeliveries are not stored twice
+ingest_index = IdempotencyIndex(
+    os.environ.get("INGEST_INDEX_DIR", "ingest_index"),
+    retain_blocks={chain: config["finality_blocks"] for chain, config in CHAIN_CONFIG.items()}
+)
+
+# Full transaction history; the per-chain files stay a short work queue for the agents
+RECEIPT_ARCHIVE_DIR = os.environ.get("RECEIPT_ARCHIVE_DIR", "receipt_archive")
+receipt_archive = ReceiptArchive(RECEIPT_ARCHIVE_DIR)
 
 # Create agents for each chain
 agents = {}
@@ -40,6 +49,146 @@ for chain_name, config in CHAIN_CONFIG.items():
     agent = Agent(name=f"{chain_name}_monitor", seed=f"{chain_name}_seed", port=config["port"])
     agents[chain_name] = agent
 
+# Rolling per-wallet activity counters for inactivity scoring
+activity_histograms = ActivityHistograms()
+
+# Running fee / gas price totals and quantiles per chain and wallet (/fees)
+fee_analytics = FeeAnalytics()
+
+# Pushes matched activity to dashboard clients (/stream, /ws)
+activity_broadcaster = ActivityBroadcaster()
+
+# Set PUSH_RPC_URL and LOCK_SENDER_UEAS (comma-separated Push Chain UEAs that
+# created the monitored locks) to credit origin-chain activity to the UEA owner
+PUSH_RPC_URL = os.environ.get("PUSH_RPC_URL")
+LOCK_SENDER_UEAS = [a.strip() for a in os.environ.get("LOCK_SENDER_UEAS", "").split(",") if a.strip()]
+uea_resolver = UEAResolver(HttpJsonRpcTransport(PUSH_RPC_URL), cache_file="uea_cache.json") if PUSH_RPC_URL else None
+UEA_REFRESH_INTERVAL = 300
+
+def refresh_lock_senders():
+    """
+    Resolve the configured lock-sender UEAs so identity() knows their origin
+    owners. Cached origins are only fetched again once the resolver's TTL expires.
+    """
+    if uea_resolver is None or not LOCK_SENDER_UEAS:
+        return
+    origins = uea_resolver.resolve_many(LOCK_SENDER_UEAS)
+    for address in LOCK_SENDER_UEAS:
+        if address.lower() in origins and origins[address.lower()] is None:
+            print(f"⚠️ {address} is not a UEA; its lock owner cannot be linked to origin-chain activity")
+    uea_resolver.save_if_due()
+
+def resolve_owner(chain, address):
+    if uea_resolver is None:
+        return address.lower()
+    return uea_resolver.identity(CHAIN_CONFIG[chain]["caip2"], address)
+
+# Latest confirmed activity per owner across all chains (feeds releaseFunds)
+cross_chain_activity = CrossChainActivityMerger(
+    confirmations={chain: config["confirmations"] for chain, config in CHAIN_CONFIG.items()},
+    resolve_owner=resolve_owner
+)
+
+# Set <CHAIN>_RPC_URL (e.g. SEPOLIA_RPC_URL) so outgoing activity is dated with
+# its block time; without it the chain's activity cannot feed releaseFunds
+CHAIN_RPC_URLS = {chain: os.environ[f"{chain.upper()}_RPC_URL"] for chain in CHAIN_CONFIG
+                  if os.environ.get(f"{chain.upper()}_RPC_URL")}
+for chain in CHAIN_CONFIG:
+    if chain not in CHAIN_RPC_URLS:
+        print(f"⚠️ {chain.upper()}_RPC_URL is not set; {chain} activity is not counted as last activity")
+block_timestamps = BlockTimestamps({chain: HttpJsonRpcTransport(url) for chain, url in CHAIN_RPC_URLS.items()})
+
+# Owner / beneficiary notifications: comma-separated webhook URLs or mailto: addresses
+NOTIFY_RECIPIENTS = {
+    role: [d.strip() for d in os.environ.get(f"NOTIFY_{role.upper()}", "").split(",") if d.strip()]
+    for role in ("owner", "beneficiary")
+}
+# The lock's inactivityPeriod in seconds; enables deadline warnings
+INACTIVITY_PERIOD = int(os.environ.get("INACTIVITY_PERIOD", "0"))
+# Warn when the release deadline is this close (seconds); 0 = deadline passed
+DEADLINE_WARNINGS = sorted(int(w) for w in os.environ.get("NOTIFY_DEADLINE_WARNINGS", "0,3600,86400,604800").split(","))
+
+notification_senders = {"webhook": WebhookSender()}
+if os.environ.get("SMTP_HOST"):
+    notification_senders["email"] = SmtpSender(
+        os.environ["SMTP_HOST"],
+        port=int(os.environ.get("SMTP_PORT", "587")),
+        sender=os.environ.get("SMTP_FROM", "monitor@localhost"),
+        username=os.environ.get("SMTP_USER"),
+        password=os.environ.get("SMTP_PASSWORD")
+    )
+notifier = (NotificationDispatcher(Outbox(os.environ.get("NOTIFY_OUTBOX", "notifications.db")), notification_senders)
+            if any(NOTIFY_RECIPIENTS.values()) else None)
+
+def notify(roles, payload, dedup_key):
+    """Queue a notification; delivery happens on the notifier thread"""
+    if notifier is None:
+        return
+    notifier.notify([d for role in roles for d in NOTIFY_RECIPIENTS[role]], payload, dedup_key)
+
+def check_deadline(owner, wallet):
+    """Warn owner and beneficiaries once per threshold as the release deadline approaches"""
+    if notifier is None or not INACTIVITY_PERIOD:
+        return
+    latest = cross_chain_activity.latest(owner)
+    if not latest:
+        return
+    deadline = latest[0] + INACTIVITY_PERIOD
+    remaining = deadline - time.time()
+    for warning in DEADLINE_WARNINGS:
+        if remaining <= warning:
+            if remaining > 0:
+                text = f"Wallet {wallet} has been inactive; funds become releasable in {remaining / 3600:.1f}h"
+            else:
+                text = f"Wallet {wallet} has been inactive past its deadline; funds can be released"
+            notify(("owner", "beneficiary"), {
+                "event": "deadline",
+                "wallet": wallet,
+                "owner": owner,
+                "last_activity": latest[0],
+                "deadline": deadline,
+                "subject": "Inactivity deadline approaching" if remaining > 0 else "Inactivity deadline passed",
+                "text": text
+            }, f"deadline:{owner}:{latest[0]}:{warning}")
+            break
+
+# Set MONITOR_ADMIN_ENABLED and MONITOR_ADMIN_TOKEN to expose /admin profiling
+# endpoints (off: no overhead). The server listens on every interface, so the
+# routes are never registered without a token.
+if os.environ.get("MONITOR_ADMIN_ENABLED"):
+    if os.environ.get("MONITOR_ADMIN_TOKEN"):
+        from profiling import register_admin_routes
+        register_admin_routes(app, os.environ["MONITOR_ADMIN_TOKEN"],
+                              os.environ.get("MONITOR_ADMIN_DIR", "profiles"))
+    else:
+        print("⚠️ MONITOR_ADMIN_ENABLED is set but MONITOR_ADMIN_TOKEN is not; admin endpoints disabled")
+
+# Only receipts involving a monitored wallet are queued for the agents, which
+# report all of them each tick. Set PRIORITY_MATCHING to serve the most urgent
+# lock's matches first, at most MATCH_BATCH_SIZE per tick, with the others
+# aged over PRIORITY_HORIZON seconds
+PRIORITY_MATCHING = bool(os.environ.get("PRIORITY_MATCHING"))
+MATCH_BATCH_SIZE = int(os.environ.get("MATCH_BATCH_SIZE", "200"))
+PRIORITY_HORIZON = int(os.environ.get("PRIORITY_HORIZON", "3600"))
+
+# Webhook ingestion and the agents' matching stage
+pipeline = MonitorPipeline(
+    CHAIN_CONFIG, ingest_index,
+    receipt_archive=receipt_archive,
+    webhook_archive=webhook_archive,
+    cross_chain=cross_chain_activity,
+    resolve_owner=resolve_owner,
+    block_timestamps=block_timestamps,
+    fee_analytics=fee_analytics,
+    histograms=activity_histograms,
+    broadcaster=activity_broadcaster,
+    notify=notify,
+    priority=PRIORITY_MATCHING,
+    inactivity_period=INACTIVITY_PERIOD,
+    batch_size=MATCH_BATCH_SIZE,
+    horizon=PRIORITY_HORIZON
+)
+
 # Currently active chain (will be detected from incoming data)
 current_chain = "sepolia"
 
@@ -47,152 +196,172 @@ current_chain = "sepolia"
 async def webhook_receiver(request: Request):
     """
     Single webhook endpoint that handles all chains - just like the working Sepolia version
+    Receipts reach the agents' matching queues while the body is still streaming
     """
     global current_chain
+    result = await pipeline.ingest(request.stream(), request.headers)
+    if result["status"] != "ok":
+        # Not stored: a 5xx makes the provider deliver the batch again
+        return JSONResponse(status_code=503, content=result)
+    current_chain = result.get("chain", current_chain)
+    return result
+
+@app.on_event("startup")
+async def bind_activity_stream():
+    activity_broadcaster.bind_loop(asyncio.get_running_loop())
+
+@app.on_event("startup")
+async def start_uea_refresh():
+    if uea_resolver is None:
+        return
+    if not LOCK_SENDER_UEAS:
+        print("⚠️ PUSH_RPC_URL is set without LOCK_SENDER_UEAS; activity stays keyed by wallet address")
+        return
     
-    try:
-        webhook_data = await request.json()
-        
-        # Auto-detect chain type from transaction data
-        detected_chain = "sepolia"  # default
-        if "data" in webhook_data and isinstance(webhook_data["data"], list):
-            for batch in webhook_data["data"]:
-                if isinstance(batch, list) and len(batch) > 0:
-                    sample_tx = batch[0]
-                    # Simple chain detection logic
-                    if isinstance(sample_tx, dict):
-                        # Look for chain-specific fields
-                        if sample_tx.get("chainId") == "0x38":  # BNB Chain
-                            detected_chain = "bnb"
-                        elif "l1Fee" in sample_tx or "l1GasUsed" in sample_tx:  # Optimism
-                            detected_chain = "optimism"
-        
-        current_chain = detected_chain
-        
-        print(f"\n🔗 CHAIN DETECTED: {current_chain.upper()}")
-        print(f"📥 Received webhook data from {current_chain.upper()}:")
-        
-        # Extract transactions (exactly like working Sepolia version)
-        transactions = []
-        if "data" in webhook_data and isinstance(webhook_data["data"], list):
-            for batch in webhook_data["data"]:
-                if isinstance(batch, list):
-                    for receipt in batch:
-                        if isinstance(receipt, dict):
-                            tx = {
-                                "hash": receipt.get("transactionHash", ""),
-                                "blockNumber": receipt.get("blockNumber", ""),
-                                "blockHash": receipt.get("blockHash", ""),
-                                "from": receipt.get("from", ""),
-                                "to": receipt.get("to", ""),
-                                "contractAddress": receipt.get("contractAddress"),
-                                "cumulativeGasUsed": receipt.get("cumulativeGasUsed", ""),
-                                "effectiveGasPrice": receipt.get("effectiveGasPrice", ""),
-                                "gasUsed": receipt.get("gasUsed", ""),
-                                "status": receipt.get("status", ""),
-                                "timestamp": datetime.now().isoformat(),
-                                "raw_data": receipt
-                            }
-                            transactions.append(tx)
-                            
-                            # Show transaction info clearly
-                            print(f"  📝 Tx: {tx['hash'][:15]}... | From: {tx['from'][:10]}... | To: {tx['to'][:10]}...")
-        
-        # Save to chain-specific file
-        transactions_file = CHAIN_CONFIG[current_chain]["file"]
-        existing_transactions = []
-        if os.path.exists(transactions_file):
-            try:
-                with open(transactions_file, 'r') as f:
-                    existing_transactions = json.load(f)
-            except:
-                existing_transactions = []
-        
-        existing_transactions.extend(transactions)
-        if len(existing_transactions) > 100:
-            existing_transactions = existing_transactions[-100:]
-        
-        with open(transactions_file, 'w') as f:
-            json.dump(existing_transactions, f, indent=2)
-        
-        print(f"💾 Stored {len(transactions)} {current_chain.upper()} transactions")
-        print("-" * 60)
-        
-        return {"status": "ok", "transactions_stored": len(transactions), "chain": current_chain}
+    async def refresh_forever():
+        while True:
+            await asyncio.to_thread(refresh_lock_senders)
+            await asyncio.sleep(UEA_REFRESH_INTERVAL)
+    
+    asyncio.get_running_loop().create_task(refresh_forever())
+
+@app.on_event("shutdown")
+async def save_uea_cache():
+    if uea_resolver is not None:
+        uea_resolver.save()
+
+@app.on_event("shutdown")
+async def stop_notifier():
+    if notifier is not None:
+        notifier.stop()
+
+@app.get("/stream")
+async def activity_stream(wallet: str = None, chain: str = None):
+    """
+    Server-Sent Events stream of detected wallet activity
+    Optional comma-separated wallet/chain filters
+    """
+    subscriber = activity_broadcaster.subscribe(parse_filter(chain), parse_filter(wallet))
+    return StreamingResponse(
+        activity_broadcaster.sse_frames(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws")
+async def activity_websocket(websocket: WebSocket, wallet: str = None, chain: str = None):
+    """WebSocket variant of /stream"""
+    await websocket.accept()
+    subscriber = activity_broadcaster.subscribe(parse_filter(chain), parse_filter(wallet))
+    
+    async def send_messages():
+        async for message in activity_broadcaster.websocket_messages(subscriber):
+            await websocket.send_text(message)
+        await websocket.close(code=1013)  # evicted as a slow consumer
+    
+    async def wait_for_disconnect():
+        # uvicorn only reports a closed socket through receive(), so keep
+        # reading even though clients never send anything
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
     
-    except Exception as e:
-        print(f"❌ Error processing webhook: {str(e)}")
-        return {"status": "error", "message": str(e)}
+    sender = asyncio.ensure_future(send_messages())
+    receiver = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (sender, receiver):
+            task.cancel()
+        for result in await asyncio.gather(sender, receiver, return_exceptions=True):
+            if isinstance(result, Exception) and not isinstance(result, WebSocketDisconnect):
+                print(f"⚠️ WebSocket subscriber failed: {result}")
+        activity_broadcaster.unsubscribe(subscriber)
+
+@app.get("/fees")
+async def fees(wallet: str = None, chain: str = None):
+    """Fee totals and p50/p95 gas price per chain, or for one wallet"""
+    return fee_analytics.query(chain=chain, wallet=wallet)
 
 # Set up agent monitoring for each chain
 def create_agent_functions(chain_name, config):
     """Create monitoring functions for each chain"""
+    # Buffered monitor state, written once per tick instead of once per set()
+    state = CoalescingStorage(f"{chain_name}_monitor_state.json")
+    
+    def seed_latest_activity():
+        """
+        Give the merger the last activity saved before a restart (idempotent)
+        last_active is not a fallback: it also counts incoming transfers and
+        is dated with the webhook arrival time
+        """
+        saved = state.get("cross_chain_latest")
+        if saved is not None:
+            cross_chain_activity.seed(resolve_owner(chain_name, config["wallet"]), *saved)
+    
+    @agents[chain_name].on_event("startup")
+    async def restore_histogram(ctx: Context):
+        state.migrate_from(ctx.storage, ("processed_tx", "last_active", "activity_count", "activity_histogram"))
+        saved = state.get("activity_histogram")
+        if saved:
+            activity_histograms.restore(chain_name, config["wallet"], saved)
+        saved_fees = state.get("fee_analytics")
+        if saved_fees:
+            fee_analytics.restore(chain_name, config["wallet"], saved_fees)
+        seed_latest_activity()
+        queued = pipeline.seed(chain_name, pipeline.processed(state))
+        if queued:
+            ctx.logger.info(f"📥 Re-queued {queued} unprocessed {chain_name.upper()} receipts")
+    
+    @agents[chain_name].on_event("shutdown")
+    async def save_state(ctx: Context):
+        state.flush()
     
     @agents[chain_name].on_interval(period=5)
     async def check_wallet_activity(ctx: Context):
-        processed_tx = ctx.storage.get("processed_tx") or []
-        
-        tx_list = []
-        if os.path.exists(config["file"]):
-            try:
-                with open(config["file"], 'r') as f:
-                    tx_list = json.load(f)
-            except Exception as e:
-                ctx.logger.error(f"Error reading {chain_name} transactions: {e}")
-                return
-        
-        if not tx_list:
-            return
-        
-        ctx.logger.info(f"📊 Checking {len(tx_list)} {chain_name.upper()} transactions...")
-        
-        for tx in tx_list:
-            tx_hash = tx.get("hash") or tx.get("blockHash") or None
-            if not tx_hash or tx_hash in processed_tx:
-                continue
-            
-            from_address = (tx.get("from") or "").lower()
-            to_address = (tx.get("to") or "").lower()
-            monitored_lower = config["wallet"].lower()
-            
-            if from_address == monitored_lower or to_address == monitored_lower:
-                timestamp = tx.get("timestamp") or datetime.now().isoformat()
-                block_number = tx.get("blockNumber", "unknown")
-                
-                if from_address == monitored_lower:
-                    ctx.logger.info(f"🚀 OUTGOING {chain_name.upper()} transaction detected!")
-                    ctx.logger.info(f"   From: {config['wallet']}")
-                    ctx.logger.info(f"   To: {tx.get('to', 'unknown')}")
-                else:
-                    ctx.logger.info(f"📨 INCOMING {chain_name.upper()} transaction detected!")
-                    ctx.logger.info(f"   From: {tx.get('from', 'unknown')}")
-                    ctx.logger.info(f"   To: {config['wallet']}")
-                
-                ctx.logger.info(f"   Block: {block_number}")
-                ctx.logger.info(f"   Time: {timestamp}")
-                ctx.logger.info(f"   Hash: {tx_hash[:20]}...")
-                
-                ctx.storage.set("last_active", timestamp)
-                activity_count = ctx.storage.get("activity_count") or 0
-                ctx.storage.set("activity_count", activity_count + 1)
-            
-            processed_tx.append(tx_hash)
-        
-        if len(processed_tx) > 200:
-            processed_tx = processed_tx[-200:]
-        ctx.storage.set("processed_tx", processed_tx)
+        pipeline.process(chain_name, state, ctx.logger)
     
     @agents[chain_name].on_interval(period=30)
     async def status_update(ctx: Context):
-        last_active = ctx.storage.get("last_active")
-        activity_count = ctx.storage.get("activity_count") or 0
+        last_active = state.get("last_active")
+        activity_count = state.counter("activity_count").value
         
         if last_active:
             ctx.logger.info(f"📈 Monitoring {chain_name.upper()} wallet: {config['wallet']}")
             ctx.logger.info(f"🎯 Total activities detected: {activity_count}")
             ctx.logger.info(f"⏰ Last activity: {last_active}")
+            recent_count = activity_histograms.count(chain_name, config["wallet"], 7 * DAY)
+            longest_gap = activity_histograms.gap(chain_name, config["wallet"]) or 0
+            owner = resolve_owner(chain_name, config["wallet"])
+            seed_latest_activity()  # the owner identity may have resolved since startup
+            latest_anywhere = cross_chain_activity.latest(owner)
+            if latest_anywhere:
+                # Persist it so deadline warnings survive restarts of an inactive owner
+                state.set("cross_chain_latest", list(latest_anywhere))
+                ctx.logger.info(f"🌐 Latest activity on any chain: {datetime.fromtimestamp(latest_anywhere[0]).isoformat()} "
+                                f"({latest_anywhere[1]}) | releaseFunds timestamp: "
+                                f"{cross_chain_activity.onchain_timestamp(owner)}")
+            check_deadline(owner, config["wallet"])
+            if uea_resolver is not None:
+                ctx.logger.info(f"🪪 UEA cache hit rate: {uea_resolver.metrics()['hit_rate']:.1%}")
+            ctx.logger.info(f"🗓️ Last 7 days: {recent_count} txs | Longest gap: {longest_gap / 3600:.1f}h")
+            wallet_fees = fee_analytics.query(chain=chain_name, wallet=config["wallet"])["wallets"].get(chain_name)
+            if wallet_fees and wallet_fees["gas_price_gwei"]["p50"] is not None:
+                ctx.logger.info(f"⛽ Spent {wallet_fees['total_fee_eth']:.6f} in fees over {wallet_fees['count']} txs | "
+                                f"p50/p95 gas price: {wallet_fees['gas_price_gwei']['p50']:.2f}/"
+                                f"{wallet_fees['gas_price_gwei']['p95']:.2f} gwei")
+            
+            # Persist the histogram so inactivity history survives restarts
+            histogram = activity_histograms.snapshot(chain_name, config["wallet"])
+            if histogram:
+                state.set("activity_histogram", histogram)
         else:
             ctx.logger.info(f"👀 Monitoring {chain_name.upper()} wallet: {config['wallet']} (No activity yet)")
+        
+        # Chain fee stats accumulate even before the wallet's first transaction
+        fee_snapshot = fee_analytics.snapshot(chain_name, config["wallet"])
+        if fee_snapshot:
+            state.set("fee_analytics", fee_snapshot)
+        state.flush()
 
 # Create agent functions for all chains
 for chain_name, config in CHAIN_CONFIG.items():
@@ -212,12 +381,17 @@ def start_monitoring():
     
     # Start all agents in background threads
     for chain_name, agent in agents.items():
-        thread = threading.Thread(target=run_agent, args=(agent,), daemon=True)
+        thread = threading.Thread(target=run_agent, args=(agent,), name=f"{chain_name}_agent", daemon=True)
         thread.start()
         print(f"✅ {chain_name.upper()} agent started (port {CHAIN_CONFIG[chain_name]['port']})")
     
     print("\n📡 Starting webhook server on port 3001...")
-    print("🎯 Monitoring wallet: 0xdB630944101765cfb1f6836AE7579Eee1cdBbCBC")
+    print(f"🎯 Monitoring wallet: {MONITORED_WALLET}")
+    if webhook_archive is not None:
+        print(f"📼 Archiving raw webhooks to {WEBHOOK_ARCHIVE_DIR}")
+    if notifier is not None:
+        notifier.start()
+        print(f"🔔 Notifying {sum(len(d) for d in NOTIFY_RECIPIENTS.values())} destination(s)")
     print("📋 Use this webhook URL for ALL chains: https://your-ngrok-url/webhook")
     print("\nPress Ctrl+C to stop...\n")
     
@@ -0,0 +1,297 @@
+"""
+Process supervisor for the per-chain monitors
+Starts each chain's webhook server (ingest role) and agent (monitor role),
+waits for readiness probes instead of fixed sleeps, restarts crashed children
+with exponential backoff, shuts everything down gracefully (ingest first, so
+each monitor can drain what was already received) and periodically reports
+per-child CPU and RSS.
+
+Usage:
+    python supervisor.py [--chains sepolia bnb optimism]
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+CHAINS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chains")
+
+# Ports each chain's scripts listen on (webhook server, agent)
+CHAIN_PORTS = {
+    "sepolia": (3001, 8001),
+    "bnb": (3002, 8002),
+    "optimism": (3003, 8003)
+}
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class ChildSpec:
+    """How to run and probe one supervised process"""
+
+    def __init__(self, name, argv, cwd, port=None, env=None, depends_on=(),
+                 ready_timeout=30, stop_timeout=10, drain_delay=0):
+        self.name = name
+        self.argv = argv
+        self.cwd = cwd
+        self.port = port
+        self.env = env or {}
+        self.depends_on = tuple(depends_on)
+        self.ready_timeout = ready_timeout
+        self.stop_timeout = stop_timeout
+        self.drain_delay = drain_delay  # seconds to keep running after its dependencies stop
+
+
+class Child:
+    """Runtime state of a supervised process"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.process = None
+        self.started_at = None
+        self.restarts = 0
+        self.backoff = 0
+        self.restart_at = None
+        self.cpu_sample = None
+        self.ready = False
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+
+def port_ready(port, host="127.0.0.1", timeout=0.5):
+    """Readiness probe: the child accepts TCP connections on its port"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def process_usage(pid):
+    """Return (cpu_seconds, rss_bytes) for a pid, or None if unavailable"""
+    if psutil is not None:
+        try:
+            proc = psutil.Process(pid)
+            times = proc.cpu_times()
+            return times.user + times.system, proc.memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / ticks
+        rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+        return cpu_seconds, rss
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class Supervisor:
+    """
+    Keeps a set of child processes running
+
+    A child starts once everything it depends on passes its readiness probe
+    (or has had ready_timeout seconds to do so). Startup happens inside the
+    supervision loop, so a child that crashes while others are still coming
+    up is restarted without waiting for them. A crashed child is restarted after
+    initial_backoff seconds, doubling up to max_backoff; the backoff resets
+    once the child has stayed up for stable_after seconds.
+    """
+
+    def __init__(self, specs, initial_backoff=1, max_backoff=60, stable_after=60,
+                 stats_interval=60):
+        self.children = {spec.name: Child(spec) for spec in specs}
+        self.order = [spec.name for spec in specs]
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.stats_interval = stats_interval
+        self.stopping = False
+
+    def run(self):
+        """Start every child and supervise until SIGINT/SIGTERM"""
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        try:
+            last_stats = time.monotonic()
+            while not self.stopping:
+                self._start_pending()
+                self._check_children()
+                if time.monotonic() - last_stats >= self.stats_interval:
+                    self.report()
+                    last_stats = time.monotonic()
+                time.sleep(0.5)
+        finally:
+            self.shutdown()
+
+    def _request_stop(self, signum, frame):
+        if not self.stopping:
+            print(f"\n⏹  Received {signal.Signals(signum).name}, shutting down monitoring system...")
+        self.stopping = True
+
+    def _start_pending(self):
+        """Spawn never-started children whose dependencies have settled"""
+        now = time.monotonic()
+        for name in self.order:
+            child = self.children[name]
+            if child.process is not None:
+                continue
+            dependencies = [self.children[dependency] for dependency in child.spec.depends_on]
+            if all(self._settled(dependency, now) for dependency in dependencies):
+                for dependency in dependencies:
+                    if not dependency.ready:
+                        print(f"⚠️  {dependency.spec.name} not ready, starting {name} anyway")
+                self._spawn(child)
+
+    def _settled(self, child, now):
+        """Ready, or started more than ready_timeout seconds ago"""
+        if self.is_ready(child):
+            return True
+        return child.started_at is not None and now - child.started_at >= child.spec.ready_timeout
+
+    def is_ready(self, child):
+        """Probe a running child once; stays true until it is respawned"""
+        if not child.ready and child.running:
+            child.ready = child.spec.port is None or port_ready(child.spec.port)
+        return child.ready and child.running
+
+    def _spawn(self, child):
+        spec = child.spec
+        env = dict(os.environ, **spec.env)
+        print(f"🚀 Starting {spec.name}: {' '.join(spec.argv)}")
+        # Own session so a terminal Ctrl+C reaches only the supervisor,
+        # which then stops children in dependency order
+        child.process = subprocess.Popen(spec.argv, cwd=spec.cwd, env=env, start_new_session=True)
+        child.started_at = time.monotonic()
+        child.restart_at = None
+        child.cpu_sample = None
+        child.ready = False
+
+    def _check_children(self):
+        now = time.monotonic()
+        for name in self.order:
+            child = self.children[name]
+            if child.process is None:
+                continue  # not started yet, see _start_pending
+            if child.running:
+                self.is_ready(child)
+                if child.backoff and now - child.started_at >= self.stable_after:
+                    child.backoff = 0
+                continue
+            if child.restart_at is None:
+                code = child.process.returncode if child.process else None
+                child.backoff = min(child.backoff * 2 or self.initial_backoff, self.max_backoff)
+                child.restart_at = now + child.backoff
+                print(f"💥 {name} exited with code {code}; restarting in {child.backoff}s")
+            elif now >= child.restart_at:
+                child.restarts += 1
+                self._spawn(child)
+
+    def report(self):
+        """Print per-child CPU% and RSS"""
+        now = time.monotonic()
+        for name in self.order:
+            child = self.children[name]
+            if not child.running:
+                print(f"📉 {name}: down (restarts: {child.restarts})")
+                continue
+            usage = process_usage(child.process.pid)
+            if usage is None:
+                print(f"📊 {name}: pid {child.process.pid} (usage unavailable)")
+                continue
+            cpu_seconds, rss = usage
+            cpu_percent = 0.0
+            if child.cpu_sample is not None:
+                prev_time, prev_cpu = child.cpu_sample
+                if now > prev_time:
+                    cpu_percent = 100.0 * (cpu_seconds - prev_cpu) / (now - prev_time)
+            child.cpu_sample = (now, cpu_seconds)
+            print(f"📊 {name}: pid {child.process.pid} | CPU {cpu_percent:.1f}% | "
+                  f"RSS {rss / (1024 * 1024):.1f} MiB | restarts {child.restarts}")
+
+    def _stop_stages(self):
+        """Children grouped by dependency depth: ingest roles, then their monitors"""
+        depth = {}
+        for name in self.order:
+            dependencies = self.children[name].spec.depends_on
+            depth[name] = 1 + max((depth.get(dependency, 0) for dependency in dependencies), default=-1)
+        stages = {}
+        for name in self.order:
+            stages.setdefault(depth[name], []).append(self.children[name])
+        return [stages[level] for level in sorted(stages)]
+
+    def shutdown(self):
+        """
+        Stop children in dependency order: ingest first so nothing new
+        arrives, then each monitor after its drain_delay so it can process
+        what was already received before its shutdown handlers run
+        """
+        self.stopping = True
+        for stage_number, stage in enumerate(self._stop_stages()):
+            running = [child for child in stage if child.running]
+            if not running:
+                continue
+            drain_delay = max(child.spec.drain_delay for child in running)
+            if stage_number and drain_delay:
+                print(f"⏳ Letting {', '.join(child.spec.name for child in running)} drain for {drain_delay}s...")
+                time.sleep(drain_delay)
+            for child in running:
+                print(f"🛑 Stopping {child.spec.name}...")
+                # SIGINT lets uvicorn finish in-flight requests and the agents
+                # run their shutdown handlers
+                child.process.send_signal(signal.SIGINT)
+            for child in running:
+                try:
+                    child.process.wait(timeout=child.spec.stop_timeout)
+                except subprocess.TimeoutExpired:
+                    print(f"⚠️  {child.spec.name} did not stop in {child.spec.stop_timeout}s, killing")
+                    child.process.kill()
+                    child.process.wait()
+
+
+def chain_specs(chain):
+    """Ingest and monitor roles for one chain under chains/<chain>"""
+    chain_dir = os.path.join(CHAINS_DIR, chain)
+    webhook_port, agent_port = CHAIN_PORTS[chain]
+    ingest = ChildSpec(
+        f"{chain}-ingest",
+        [sys.executable, "webhook_server.py"],
+        chain_dir,
+        port=webhook_port,
+        env={"WEBHOOK_PORT": str(webhook_port)}
+    )
+    monitor = ChildSpec(
+        f"{chain}-monitor",
+        [sys.executable, "agent.py"],
+        chain_dir,
+        port=agent_port,
+        depends_on=[ingest.name],
+        drain_delay=5  # one check_wallet_activity tick
+    )
+    return [ingest, monitor]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Supervise per-chain webhook servers and agents")
+    parser.add_argument("--chains", nargs="+", default=list(CHAIN_PORTS), choices=list(CHAIN_PORTS))
+    parser.add_argument("--stats-interval", type=float, default=60)
+    args = parser.parse_args(argv)
+
+    specs = []
+    for chain in args.chains:
+        specs.extend(chain_specs(chain))
+    Supervisor(specs, stats_interval=args.stats_interval).run()
+
+
+if __name__ == "__main__":
+    main()
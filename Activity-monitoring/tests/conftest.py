@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the top-level monitor modules the same way the chain scripts do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
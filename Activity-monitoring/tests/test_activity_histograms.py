@@ -0,0 +1,49 @@
+from activity_histograms import WalletHistogram, HOUR
+
+
+def test_longest_gap_in_order():
+    histogram = WalletHistogram()
+    for ts in (0, HOUR, 5 * HOUR, 6 * HOUR):
+        histogram.record(ts)
+    assert histogram.longest_gap == 4 * HOUR
+    assert histogram.gap(now=6 * HOUR) == 4 * HOUR
+
+
+def test_out_of_order_record_splits_longest_gap():
+    histogram = WalletHistogram()
+    for ts in (0, HOUR, 9 * HOUR, 10 * HOUR):
+        histogram.record(ts)
+    assert histogram.longest_gap == 8 * HOUR
+    histogram.record(5 * HOUR)
+    assert histogram.longest_gap == 4 * HOUR
+    histogram.record(-3 * HOUR)
+    assert histogram.longest_gap == 4 * HOUR
+    assert histogram.first_seen == -3 * HOUR
+
+
+def test_untracked_gaps_bound_longest_gap():
+    histogram = WalletHistogram(max_gaps=2)
+    for ts in (0, 10, 30, 60):  # gaps 10, 20, 30; the 10s gap is no longer tracked
+        histogram.record(ts)
+    assert histogram.gap_floor == 10
+    histogram.record(45)
+    histogram.record(20)
+    assert histogram.longest_gap == 15  # exact: 30-45 / 45-60
+    histogram.record(52)
+    histogram.record(37)
+    # The true longest gap is now 10, but only the floor (15) is known
+    assert histogram.longest_gap == 15
+
+
+def test_snapshot_round_trip_and_legacy_format():
+    histogram = WalletHistogram()
+    for ts in (0, HOUR, 9 * HOUR):
+        histogram.record(ts)
+    restored = WalletHistogram.from_dict(histogram.to_dict())
+    restored.record(5 * HOUR)
+    assert restored.longest_gap == 4 * HOUR
+
+    legacy = histogram.to_dict()
+    del legacy["gaps"], legacy["gap_floor"]
+    legacy["longest_gap"] = 8 * HOUR
+    assert WalletHistogram.from_dict(legacy).longest_gap == 8 * HOUR
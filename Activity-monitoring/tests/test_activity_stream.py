@@ -0,0 +1,131 @@
+import asyncio
+import json
+import threading
+
+from activity_stream import ActivityBroadcaster, parse_filter
+
+ALICE = "0x00000000000000000000000000000000000a11ce"
+BOB = "0x0000000000000000000000000000000000000b0b"
+
+
+def event(chain, wallet, n=0):
+    return {"chain": chain, "wallet": wallet, "hash": f"0x{n:064x}"}
+
+
+def drain(subscriber):
+    payloads = []
+    while not subscriber.queue.empty():
+        payloads.append(subscriber.queue.get_nowait())
+    return payloads
+
+
+def test_subscribers_only_get_matching_events():
+    async def scenario():
+        broadcaster = ActivityBroadcaster()
+        broadcaster.bind_loop(asyncio.get_running_loop())
+        everything = broadcaster.subscribe()
+        bnb = broadcaster.subscribe(chains=parse_filter("bnb"))
+        alice = broadcaster.subscribe(wallets=parse_filter(ALICE.upper().replace("0X", "0x")))
+        alice_sepolia = broadcaster.subscribe(chains=["sepolia"], wallets=[ALICE, BOB])
+
+        broadcaster.publish(event("sepolia", ALICE, 1))
+        broadcaster.publish(event("bnb", BOB, 2))
+        broadcaster.publish(event("bnb", ALICE, 3))
+        return {name: [json.loads(data)["hash"][-1] for data, _ in drain(subscriber)]
+                for name, subscriber in (("everything", everything), ("bnb", bnb),
+                                         ("alice", alice), ("alice_sepolia", alice_sepolia))}
+
+    assert asyncio.run(scenario()) == {
+        "everything": ["1", "2", "3"],
+        "bnb": ["2", "3"],
+        "alice": ["1", "3"],
+        "alice_sepolia": ["1"]
+    }
+
+
+def test_events_are_serialized_once_and_shared(monkeypatch):
+    import activity_stream
+
+    dumps = []
+    real_dumps = json.dumps
+
+    def counting_dumps(*args, **kwargs):
+        dumps.append(args)
+        return real_dumps(*args, **kwargs)
+
+    monkeypatch.setattr(activity_stream.json, "dumps", counting_dumps)
+
+    async def scenario():
+        broadcaster = ActivityBroadcaster()
+        broadcaster.bind_loop(asyncio.get_running_loop())
+        subscribers = [broadcaster.subscribe() for _ in range(10)]
+        broadcaster.publish(event("sepolia", ALICE))
+        return [drain(subscriber) for subscriber in subscribers]
+
+    received = asyncio.run(scenario())
+    assert len(dumps) == 1
+    assert all(payloads[0] is received[0][0] for payloads in received)
+    data, frame = received[0][0]
+    assert frame == f"event: activity\ndata: {data}\n\n".encode()
+
+
+def test_events_published_from_other_threads_reach_the_loop():
+    async def scenario():
+        broadcaster = ActivityBroadcaster()
+        broadcaster.bind_loop(asyncio.get_running_loop())
+        subscriber = broadcaster.subscribe()
+        agent = threading.Thread(target=broadcaster.publish, args=(event("bnb", BOB),))
+        agent.start()
+        agent.join()
+        data, _ = await asyncio.wait_for(subscriber.queue.get(), 1)
+        return json.loads(data)
+
+    assert asyncio.run(scenario()) == event("bnb", BOB)
+
+
+def test_slow_consumer_is_evicted_without_affecting_others():
+    async def scenario():
+        broadcaster = ActivityBroadcaster(buffer_size=2)
+        broadcaster.bind_loop(asyncio.get_running_loop())
+        slow = broadcaster.subscribe()
+        fast = broadcaster.subscribe()
+        frames = []
+        for n in range(3):
+            broadcaster.publish(event("sepolia", ALICE, n))
+            frames.append(await fast.queue.get())
+        assert slow.evicted and not fast.evicted
+        assert broadcaster.evictions == 1 and broadcaster.subscriber_count == 1
+
+        # The evicted stream ends with a notice instead of its backlog
+        sse = [frame async for frame in broadcaster.sse_frames(slow)]
+        broadcaster.publish(event("sepolia", ALICE, 3))
+        return frames, sse, drain(fast)
+
+    frames, sse, rest = asyncio.run(scenario())
+    assert len(frames) == 3 and len(rest) == 1
+    assert sse == [b"retry: 3000\n\n", b"event: evicted\ndata: {}\n\n"]
+
+
+def test_disconnected_clients_are_unsubscribed():
+    async def scenario():
+        broadcaster = ActivityBroadcaster()
+        broadcaster.bind_loop(asyncio.get_running_loop())
+        ws = broadcaster.subscribe(wallets=[ALICE])
+        sse = broadcaster.subscribe(chains=["bnb"])
+        assert broadcaster.subscriber_count == 2
+
+        messages = broadcaster.websocket_messages(ws)
+        broadcaster.publish(event("bnb", ALICE))
+        first = await messages.__anext__()
+        await messages.aclose()  # the /ws handler's finally on disconnect
+
+        frames = broadcaster.sse_frames(sse)
+        assert await frames.__anext__() == b"retry: 3000\n\n"
+        await frames.aclose()  # StreamingResponse closes the iterator when the client goes away
+
+        broadcaster.unsubscribe(ws)  # idempotent
+        return first, broadcaster.subscriber_count
+
+    first, count = asyncio.run(scenario())
+    assert json.loads(first) == event("bnb", ALICE)
+    assert count == 0
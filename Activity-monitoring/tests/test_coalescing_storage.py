@@ -0,0 +1,98 @@
+import json
+import os
+
+import pytest
+
+from coalescing_storage import CoalescingStorage
+
+
+def flushed_state(path):
+    storage = CoalescingStorage(str(path))
+    storage.counter("activity_count").increment()
+    storage.recent_set("processed_tx", 3).add("0xa")
+    storage.map("wallets").set("0xowner", 100)
+    storage.set("last_active", 100)
+    assert storage.flush()
+    return storage
+
+
+def reload(path):
+    storage = CoalescingStorage(str(path))
+    return {
+        "activity_count": storage.counter("activity_count").value,
+        "processed_tx": storage.recent_set("processed_tx", 3).to_json(),
+        "wallets": storage.map("wallets").items(),
+        "last_active": storage.get("last_active")
+    }
+
+
+LAST_FLUSH = {
+    "activity_count": 1,
+    "processed_tx": ["0xa"],
+    "wallets": [("0xowner", 100)],
+    "last_active": 100
+}
+
+
+def mutate(storage):
+    storage.counter("activity_count").increment()
+    storage.recent_set("processed_tx", 3).add("0xb")
+    storage.map("wallets").set("0xowner", 200)
+    storage.set("last_active", 200)
+
+
+def test_unflushed_mutations_are_lost_consistently(tmp_path):
+    path = tmp_path / "state.json"
+    storage = flushed_state(path)
+    mutate(storage)  # "crash" before the next flush
+    assert reload(path) == LAST_FLUSH
+
+
+def test_flush_only_writes_when_dirty(tmp_path):
+    path = tmp_path / "state.json"
+    storage = flushed_state(path)
+    assert not storage.flush()
+    mutate(storage)
+    assert storage.flush()
+    assert storage.flushes == 2
+    assert reload(path)["processed_tx"] == ["0xa", "0xb"]
+
+
+def test_failed_rename_keeps_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "state.json"
+    storage = flushed_state(path)
+    mutate(storage)
+
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail_replace)
+    with pytest.raises(OSError):
+        storage.flush()
+    assert reload(path) == LAST_FLUSH
+
+    # The mutations stay buffered and the next flush persists them
+    monkeypatch.undo()
+    assert storage.flush()
+    assert reload(path)["last_active"] == 200
+
+
+def test_interrupted_write_keeps_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "state.json"
+    storage = flushed_state(path)
+    mutate(storage)
+
+    def fail_fsync(fd):
+        raise OSError("interrupted")
+
+    monkeypatch.setattr(os, "fsync", fail_fsync)
+    with pytest.raises(OSError):
+        storage.flush()
+    monkeypatch.undo()
+
+    # A partial temp file is left behind but never read
+    with open(str(path) + ".tmp", "w") as f:
+        f.write('{"activity_count": 9')
+    assert reload(path) == LAST_FLUSH
+    with open(path) as f:
+        assert json.load(f)["activity_count"] == 1
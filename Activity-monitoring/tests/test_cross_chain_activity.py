@@ -0,0 +1,89 @@
+from cross_chain_activity import CrossChainActivityMerger
+
+
+def test_seed_restores_latest_after_restart():
+    before = CrossChainActivityMerger(confirmations={"sepolia": 0})
+    before.observe("sepolia", "0xOwner", 10, 1000)
+    saved = before.latest("0xowner")
+    assert saved == (1000, "sepolia", 10)
+
+    after = CrossChainActivityMerger(confirmations={"sepolia": 0})
+    assert after.latest("0xowner") is None
+    after.seed("0xOWNER", *saved)
+    assert after.latest("0xowner") == saved
+    assert after.onchain_timestamp("0xowner", now=5000) == 1000
+
+
+def test_seed_never_moves_latest_backwards():
+    merger = CrossChainActivityMerger(confirmations={"sepolia": 0, "bnb": 0})
+    merger.seed("0xowner", 1000, "sepolia", 10)
+    merger.seed("0xowner", 900, "bnb", 5)
+    assert merger.latest("0xowner") == (1000, "sepolia", 10)
+
+    merger.observe("sepolia", "0xowner", 11, 950)
+    assert merger.latest("0xowner") == (1000, "sepolia", 10)
+    merger.observe("sepolia", "0xowner", 12, 1100)
+    assert merger.latest("0xowner") == (1100, "sepolia", 12)
+
+
+class StubBlocks:
+    def __init__(self, timestamps):
+        self.timestamps = timestamps
+        self.requests = []
+
+    def __call__(self, requests):
+        self.requests.extend(requests)
+        return [{"jsonrpc": "2.0", "id": request["id"],
+                 "result": {"timestamp": hex(self.timestamps[int(request["params"][0], 16)])}}
+                for request in requests]
+
+
+def test_block_timestamps_are_fetched_once():
+    from cross_chain_activity import BlockTimestamps
+
+    rpc = StubBlocks({100: 1_600_000_000})
+    timestamps = BlockTimestamps({"sepolia": rpc})
+    assert timestamps("sepolia", 100) == 1_600_000_000
+    assert timestamps("sepolia", 100) == 1_600_000_000
+    assert [request["method"] for request in rpc.requests] == ["eth_getBlockByNumber"]
+    assert timestamps("sepolia", 101) is None  # RPC error
+    assert timestamps("bnb", 100) is None  # no RPC configured
+
+
+def test_only_outgoing_activity_feeds_the_merger_at_block_time(tmp_path):
+    import asyncio
+    import json
+    import logging
+
+    from coalescing_storage import CoalescingStorage
+    from cross_chain_activity import BlockTimestamps
+    from ingest_dedup import IdempotencyIndex
+    from monitor_pipeline import MonitorPipeline
+
+    wallet = "0x00000000000000000000000000000000000000aa"
+    chains = {"sepolia": {"file": str(tmp_path / "sepolia_transactions.json"), "wallet": wallet}}
+    merger = CrossChainActivityMerger(confirmations={"sepolia": 0})
+    pipeline = MonitorPipeline(chains, IdempotencyIndex(str(tmp_path / "index")), cross_chain=merger,
+                               block_timestamps=BlockTimestamps({"sepolia": StubBlocks({100: 1_600_000_000})}),
+                               log=lambda message: None)
+    state = CoalescingStorage(str(tmp_path / "sepolia_monitor_state.json"))
+
+    def deliver(sender, recipient, block):
+        receipt = {"transactionHash": f"0x{block:064x}", "blockNumber": hex(block),
+                   "from": sender, "to": recipient, "gasUsed": "0x5208"}
+        body = json.dumps({"data": [[receipt]]}).encode()
+
+        async def chunks():
+            yield body
+
+        asyncio.run(pipeline.ingest(chunks(), {}, received_at=1_700_000_000))
+        return pipeline.process("sepolia", state, logging.getLogger("test"))
+
+    # Dust sent to the wallet is activity for the dashboard, not for the lock
+    assert deliver(f"0x{1:040x}", wallet, 99)[0]["direction"] == "incoming"
+    assert merger.latest(wallet) is None
+
+    # Backfilled outgoing transaction: block time, not arrival time
+    assert deliver(wallet, f"0x{1:040x}", 100)[0]["direction"] == "outgoing"
+    assert merger.latest(wallet) == (1_600_000_000, "sepolia", 100)
+
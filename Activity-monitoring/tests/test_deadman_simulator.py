@@ -0,0 +1,22 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from deadman_simulator import compare_population, edge_case_population, evaluate, random_population, LockArrays
+
+NOW = 1_700_000_000
+
+
+def test_edge_cases_match_contract():
+    assert compare_population(*edge_case_population(NOW), NOW) == []
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_random_population_matches_contract(seed):
+    assert compare_population(*random_population(2000, NOW, seed), NOW) == []
+
+
+def test_future_activity_is_ignored():
+    locks = LockArrays([True], [NOW - 7200], [3600], [False], [False])
+    result = evaluate(locks, NOW, np.asarray([NOW + 301]))
+    assert bool(result["eligible"][0])
@@ -0,0 +1,115 @@
+import random
+
+from fee_analytics import DDSketch, FeeAnalytics, transaction_fee
+
+WALLET = "0x00000000000000000000000000000000000000aa"
+
+
+def lognormal(count, seed=0):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(20, 2) for _ in range(count)]
+
+
+def exact_quantile(values, q):
+    return sorted(values)[int(q * (len(values) - 1))]
+
+
+def tx(gas_price, sender=None, gas_used=21000):
+    return {"from": sender or f"0x{gas_price:040x}", "gasUsed": hex(gas_used), "effectiveGasPrice": hex(gas_price)}
+
+
+def test_sketch_quantiles_are_within_relative_accuracy():
+    values = lognormal(5000)
+    sketch = DDSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    for q in (0.01, 0.5, 0.95, 0.99):
+        assert abs(sketch.quantile(q) - exact_quantile(values, q)) <= 0.01 * exact_quantile(values, q)
+    assert min(values) <= sketch.quantile(0) <= 1.01 * min(values)
+    assert 0.99 * max(values) <= sketch.quantile(1) <= max(values)
+
+
+def test_collapse_bounds_bins_and_keeps_upper_quantiles():
+    values = lognormal(5000)  # spreads over ~500 bins
+    sketch = DDSketch(relative_accuracy=0.01, max_bins=200)
+    for value in values:
+        sketch.add(value)
+    assert len(sketch.bins) == 200
+    assert sketch.count == len(values)
+    for q in (0.95, 0.99):
+        assert abs(sketch.quantile(q) - exact_quantile(values, q)) <= 0.01 * exact_quantile(values, q)
+    # Only the collapsed low end loses accuracy, and only upwards
+    assert sketch.quantile(0.01) > 1.01 * exact_quantile(values, 0.01)
+
+
+def test_merged_sketches_equal_one_sketch_of_all_values():
+    first, second = lognormal(1000, seed=1), lognormal(1000, seed=2) + [0]
+    merged, left, right = DDSketch(), DDSketch(), DDSketch()
+    for value in first:
+        left.add(value)
+        merged.add(value)
+    for value in second:
+        right.add(value)
+        merged.add(value)
+    left.merge(right)
+    assert left.to_dict() == merged.to_dict()
+
+
+def test_query_reports_chain_and_wallet_spend():
+    analytics = FeeAnalytics()
+    for gwei in range(1, 101):
+        analytics.record("bnb", tx(gwei * 10 ** 9), WALLET)
+    analytics.record("bnb", tx(50 * 10 ** 9, sender=WALLET.upper().replace("0X", "0x")), WALLET)
+
+    chain = analytics.query("bnb")["chains"]["bnb"]
+    assert chain["count"] == 101
+    assert abs(chain["gas_price_gwei"]["p50"] - 50) <= 0.5
+    wallet = analytics.query(wallet=WALLET)["wallets"]["bnb"]
+    assert wallet["count"] == 1
+    assert wallet["total_fee_eth"] == 21000 * 50 * 10 ** 9 / 10 ** 18
+    assert analytics.query("sepolia") == {"chains": {}}
+
+
+def test_anomalies_need_enough_samples():
+    analytics = FeeAnalytics()
+    for gwei in range(1, 100):
+        analytics.record("bnb", tx(gwei * 10 ** 9))
+    expensive = 21000 * 1000 * 10 ** 9
+    assert not analytics.is_anomalous("bnb", expensive)  # 99 samples
+    analytics.record("bnb", tx(10 ** 9))
+    assert analytics.is_anomalous("bnb", expensive)
+    assert not analytics.is_anomalous("bnb", 21000 * 50 * 10 ** 9)
+    assert not analytics.is_anomalous("sepolia", expensive)
+
+
+def test_snapshot_restore_round_trip():
+    analytics = FeeAnalytics()
+    for gwei in range(1, 50):
+        analytics.record("optimism", dict(tx(gwei * 10 ** 9, sender=WALLET), raw_data={"l1Fee": "0x10"}), WALLET)
+    snapshot = analytics.snapshot("optimism", WALLET)
+
+    restored = FeeAnalytics()
+    restored.restore("optimism", WALLET, snapshot)
+    assert restored.query() == analytics.query()
+    assert restored.query(wallet=WALLET) == analytics.query(wallet=WALLET)
+    assert restored.snapshot("optimism", WALLET) == snapshot
+    assert restored.query("optimism")["chains"]["optimism"]["total_l1_fee_eth"] == 49 * 16 / 10 ** 18
+
+
+def test_merge_adds_one_delivery_to_the_totals():
+    analytics, delivery = FeeAnalytics(), FeeAnalytics()
+    analytics.record("bnb", tx(10 ** 9, sender=WALLET), WALLET)
+    delivery.record("bnb", tx(2 * 10 ** 9, sender=WALLET), WALLET)
+    delivery.record("sepolia", tx(3 * 10 ** 9))
+    analytics.merge(delivery)
+    assert analytics.query("bnb")["chains"]["bnb"]["count"] == 2
+    assert analytics.query(wallet=WALLET)["wallets"]["bnb"]["count"] == 2
+    assert analytics.query("sepolia")["chains"]["sepolia"]["count"] == 1
+
+
+def test_malformed_fields_are_skipped():
+    assert transaction_fee({"gasUsed": ["0x1"]}) is None
+    assert transaction_fee({"gasUsed": "0x5208", "effectiveGasPrice": {"value": 1}}) == (21000, None, None, 0)
+    assert transaction_fee({"gasUsed": "zz"}) is None
+    analytics = FeeAnalytics()
+    assert analytics.record("bnb", {"gasUsed": None}) is None
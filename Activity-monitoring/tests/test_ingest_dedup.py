@@ -0,0 +1,51 @@
+import pytest
+
+from ingest_dedup import DeliveryInFlight, IdempotencyIndex
+
+
+def receipt(index, block=100):
+    return {"blockNumber": hex(block), "transactionIndex": hex(index), "transactionHash": f"0x{index:064x}"}
+
+
+def test_receipt_repeated_within_a_delivery_is_a_duplicate(tmp_path):
+    index = IdempotencyIndex(str(tmp_path))
+    delivery = index.begin("idempotency-key:a")
+    assert delivery.is_new("sepolia", receipt(1))
+    assert not delivery.is_new("sepolia", receipt(1))
+    delivery.commit()
+    assert index.seen_delivery("idempotency-key:a")
+    assert not index.begin().is_new("sepolia", receipt(1))
+
+
+def test_receipts_of_an_inflight_delivery_are_not_duplicates(tmp_path):
+    index = IdempotencyIndex(str(tmp_path))
+    first = index.begin("idempotency-key:a")
+    assert first.is_new("sepolia", receipt(1))
+
+    # Same key, or another delivery overlapping it: retry later
+    with pytest.raises(DeliveryInFlight):
+        index.begin("idempotency-key:a")
+    overlapping = index.begin("idempotency-key:b")
+    assert overlapping.is_new("sepolia", receipt(2))
+    with pytest.raises(DeliveryInFlight):
+        overlapping.is_new("sepolia", receipt(1))
+    overlapping.abort()
+
+    # The first delivery aborts: its receipts are new to the retry
+    first.abort()
+    retry = index.begin("idempotency-key:a")
+    assert retry.is_new("sepolia", receipt(1)) and retry.is_new("sepolia", receipt(2))
+    retry.commit()
+    assert index.seen_delivery("idempotency-key:a")
+    assert not index.seen_delivery("idempotency-key:b")
+
+
+def test_committed_receipts_survive_a_restart(tmp_path):
+    index = IdempotencyIndex(str(tmp_path))
+    delivery = index.begin("idempotency-key:a")
+    delivery.is_new("sepolia", receipt(1))
+    delivery.commit()
+
+    restarted = IdempotencyIndex(str(tmp_path))
+    assert restarted.seen_delivery("idempotency-key:a")
+    assert not restarted.begin().is_new("sepolia", receipt(1))
@@ -0,0 +1,150 @@
+import asyncio
+import json
+
+from ingest_dedup import IdempotencyIndex
+from monitor_pipeline import MonitorPipeline
+
+WALLET = "0xdB630944101765cfb1f6836AE7579Eee1cdBbCBC"
+MATCHES = {3, 50, 120, 199, 250, 290}
+
+
+def receipts(count, block=100):
+    for i in range(count):
+        yield {
+            "transactionHash": f"0x{block:04x}{i:060x}",
+            "blockNumber": hex(block),
+            "transactionIndex": hex(i),
+            "from": WALLET if i in MATCHES else f"0x{i:040x}",
+            "to": f"0x{i + 1:040x}",
+            "gasUsed": "0x5208",
+            "effectiveGasPrice": "0x3b9aca00"
+        }
+
+
+async def body_chunks(data, size=4096):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def make_pipeline(tmp_path, **kwargs):
+    chains = {"sepolia": {"file": str(tmp_path / "sepolia_transactions.json"), "wallet": WALLET}}
+    index = IdempotencyIndex(str(tmp_path / "index"))
+    return MonitorPipeline(chains, index, log=lambda message: None, **kwargs)
+
+
+def deliver(pipeline, count=300, headers=None):
+    body = json.dumps({"data": [list(receipts(count))]}).encode()
+    return asyncio.run(pipeline.ingest(body_chunks(body), headers or {}, received_at=1_700_000_000))
+
+
+def test_large_delivery_queues_every_match_without_truncation(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    assert deliver(pipeline)["transactions_stored"] == 300
+    assert len(pipeline.queues["sepolia"]) == len(MATCHES)
+
+    batch = pipeline.next_batch("sepolia", set())
+    assert [direction for _, _, direction in batch] == ["outgoing"] * len(MATCHES)
+    assert not pipeline.next_batch("sepolia", set())
+
+
+def test_irrelevant_receipts_only_reach_fee_stats(tmp_path):
+    from fee_analytics import FeeAnalytics
+
+    fee_analytics = FeeAnalytics()
+    pipeline = make_pipeline(tmp_path, fee_analytics=fee_analytics)
+    deliver(pipeline)
+    assert len(pipeline.queues["sepolia"]) == len(MATCHES)
+    assert fee_analytics.query("sepolia")["chains"]["sepolia"]["count"] == 300
+    assert fee_analytics.query(wallet=WALLET)["wallets"]["sepolia"]["count"] == len(MATCHES)
+
+
+def test_priority_caps_matches_per_tick(tmp_path):
+    pipeline = make_pipeline(tmp_path, priority=True, batch_size=4)
+    deliver(pipeline)
+    assert len(pipeline.next_batch("sepolia", set())) == 4
+    assert len(pipeline.next_batch("sepolia", set())) == len(MATCHES) - 4
+
+
+def test_working_file_keeps_matches_beyond_window(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    deliver(pipeline)
+    with open(tmp_path / "sepolia_transactions.json") as f:
+        stored = json.load(f)
+    assert len(stored) == 100 + len(MATCHES & set(range(200)))
+    assert sum(1 for tx in stored if tx["from"] == WALLET) == len(MATCHES)
+    assert stored[-1]["hash"].endswith(f"{299:060x}")
+
+
+def test_seed_requeues_unprocessed_matches_after_restart(tmp_path):
+    pipeline = make_pipeline(tmp_path, priority=True, batch_size=2)
+    deliver(pipeline)
+    processed = {tx_hash for tx_hash, _, _ in pipeline.next_batch("sepolia", set())}
+
+    with open(tmp_path / "sepolia_transactions.json") as f:
+        unprocessed = [tx for tx in json.load(f) if tx["from"] == WALLET and tx["hash"] not in processed]
+    assert unprocessed
+
+    restarted = make_pipeline(tmp_path, priority=True)
+    assert restarted.seed("sepolia", processed) == len(unprocessed)
+    assert all(tx_hash not in processed for tx_hash, _, _ in restarted.next_batch("sepolia", processed))
+
+
+def test_redelivery_is_not_queued_twice(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    headers = {"idempotency-key": "batch-1"}
+    deliver(pipeline, 10, headers)
+    assert deliver(pipeline, 10, headers)["duplicate"]
+    assert deliver(pipeline, 10)["transactions_stored"] == 0
+    assert len(pipeline.queues["sepolia"]) == len(MATCHES & set(range(10)))
+
+
+def test_delivery_is_archived_with_its_headers(tmp_path):
+    from webhook_archive import WebhookArchive, iter_deliveries
+
+    archive = WebhookArchive(str(tmp_path / "archive"))
+    pipeline = make_pipeline(tmp_path, webhook_archive=archive)
+    deliver(pipeline, 5, {"idempotency-key": "batch-1"})
+    archive.close()
+    [(received_at, headers, body)] = iter_deliveries(str(tmp_path / "archive"))
+    assert received_at == 1_700_000_000
+    assert headers == {"idempotency-key": "batch-1"}
+    assert len(json.loads(body)["data"][0]) == 5
+
+
+def test_overlapping_delivery_is_retried_and_failed_one_leaves_no_trace(tmp_path):
+    from fee_analytics import FeeAnalytics
+
+    fee_analytics = FeeAnalytics()
+    pipeline = make_pipeline(tmp_path, fee_analytics=fee_analytics)
+    headers = {"idempotency-key": "batch-1"}
+    body = json.dumps({"data": [list(receipts(10))]}).encode()
+
+    async def scenario():
+        streaming = asyncio.Event()
+        disconnect = asyncio.Event()
+
+        async def interrupted():
+            yield body[:len(body) // 2]
+            streaming.set()
+            await disconnect.wait()
+            raise ConnectionResetError("client went away")
+
+        first = asyncio.ensure_future(pipeline.ingest(interrupted(), headers, received_at=1_700_000_000))
+        await streaming.wait()
+        # The provider's timeout redelivery, under the same key or another one
+        same_key = await pipeline.ingest(body_chunks(body), headers, received_at=1_700_000_001)
+        other_key = await pipeline.ingest(body_chunks(body), {"idempotency-key": "batch-2"},
+                                          received_at=1_700_000_002)
+        disconnect.set()
+        return same_key, other_key, await first
+
+    same_key, other_key, first = asyncio.run(scenario())
+    assert same_key["status"] == other_key["status"] == "retry"
+    assert first["status"] == "error"
+    assert len(pipeline.queues["sepolia"]) == 0
+    assert fee_analytics.query()["chains"] == {}
+
+    # Retried later, every receipt is stored and matched once
+    assert deliver(pipeline, 10, headers)["transactions_stored"] == 10
+    assert len(pipeline.queues["sepolia"]) == len(MATCHES & set(range(10)))
+    assert fee_analytics.query("sepolia")["chains"]["sepolia"]["count"] == 10
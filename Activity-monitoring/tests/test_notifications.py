@@ -0,0 +1,183 @@
+import asyncio
+import time
+
+import pytest
+
+from notifications import DeliveryError, NotificationDispatcher, Outbox, destination_host
+
+OWNER = "https://hooks.example/owner"
+BENEFICIARY = "https://hooks.example/beneficiary"
+
+
+class StubSender:
+    """Records every batch; raises the queued failures first"""
+
+    def __init__(self, failures=(), delay=0):
+        self.failures = list(failures)
+        self.delay = delay
+        self.calls = []
+        self.active = {}
+        self.max_active = {}
+
+    async def send(self, destination, notifications):
+        host = destination_host(destination)
+        self.active[host] = self.active.get(host, 0) + 1
+        self.max_active[host] = max(self.max_active.get(host, 0), self.active[host])
+        try:
+            await asyncio.sleep(self.delay)
+            self.calls.append((destination, [n["n"] for n in notifications]))
+            if self.failures:
+                raise self.failures.pop(0)
+        finally:
+            self.active[host] -= 1
+
+    async def close(self):
+        pass
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def dispatcher(tmp_path, sender, **kwargs):
+    kwargs.setdefault("base_backoff", 0.01)
+    kwargs.setdefault("poll_interval", 0.05)
+    return NotificationDispatcher(Outbox(str(tmp_path / "outbox.db")), {"webhook": sender}, **kwargs)
+
+
+def test_notify_only_buffers_until_the_dispatcher_flushes(tmp_path):
+    notifier = dispatcher(tmp_path, StubSender())
+    assert notifier.notify([OWNER, BENEFICIARY], {"n": 0}, "activity:1") == 2
+    assert notifier.notify([OWNER], {"n": 0}, "activity:1") == 1
+    assert notifier.outbox.stats() == {}
+    assert notifier.flush() == 2  # the repeated dedup key is dropped
+    assert notifier.outbox.stats() == {"pending": 2}
+    with pytest.raises(ValueError):
+        notifier.notify(["ftp://example"], {"n": 1})
+
+
+def test_due_notifications_are_batched_per_destination(tmp_path):
+    sender = StubSender()
+    notifier = dispatcher(tmp_path, sender)
+    for n in range(3):
+        notifier.notify([OWNER], {"n": n}, f"activity:{n}")
+    notifier.notify([BENEFICIARY], {"n": 9})
+    notifier.start()
+    try:
+        wait_for(lambda: notifier.delivered == 4)
+    finally:
+        notifier.stop()
+    assert sorted(sender.calls) == [(BENEFICIARY, [9]), (OWNER, [0, 1, 2])]
+    assert notifier.outbox.stats() == {"sent": 4}
+
+
+def test_transient_failures_are_retried_with_backoff(tmp_path):
+    sender = StubSender([DeliveryError("HTTP 503"), DeliveryError("HTTP 503")])
+    notifier = dispatcher(tmp_path, sender)
+    notifier.notify([OWNER], {"n": 1})
+    notifier.start()
+    try:
+        wait_for(lambda: notifier.delivered == 1)
+    finally:
+        notifier.stop()
+    assert sender.calls == [(OWNER, [1])] * 3
+    assert notifier.failed == 2
+    assert notifier.outbox.stats() == {"sent": 1}
+    assert all(0 <= notifier.backoff(attempts) <= min(notifier.max_backoff, 0.01 * 2 ** attempts)
+               for attempts in range(20))
+
+
+def test_permanent_failures_are_dead_without_retry(tmp_path):
+    sender = StubSender([DeliveryError("HTTP 404", permanent=True)])
+    notifier = dispatcher(tmp_path, sender)
+    notifier.notify([OWNER], {"n": 1})
+    notifier.start()
+    try:
+        wait_for(lambda: notifier.failed == 1)
+        time.sleep(0.1)
+    finally:
+        notifier.stop()
+    assert sender.calls == [(OWNER, [1])]
+    assert notifier.outbox.stats() == {"dead": 1}
+
+
+def test_requests_per_host_are_limited(tmp_path):
+    sender = StubSender(delay=0.05)
+    notifier = dispatcher(tmp_path, sender, per_destination=2)
+    notifier.notify([f"https://hooks.example/{n}" for n in range(5)], {"n": 1})
+    notifier.notify([f"https://other.example/{n}" for n in range(2)], {"n": 2})
+    notifier.start()
+    try:
+        wait_for(lambda: notifier.delivered == 7)
+    finally:
+        notifier.stop()
+    # All destinations were claimed together, but each host saw at most two requests at a time
+    assert sender.max_active == {"hooks.example": 2, "other.example": 2}
+
+
+def test_claim_due_is_limited_and_skips_inflight_destinations(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    outbox.enqueue_many([(OWNER, {"n": n}, None) for n in range(5)] +
+                        [(BENEFICIARY, {"n": n}, None) for n in range(5)])
+    assert sum(len(batch) for batch in outbox.claim_due(limit=3).values()) == 3
+    batches = outbox.claim_due(exclude={OWNER}, max_batch=2)
+    assert list(batches) == [BENEFICIARY] and len(batches[BENEFICIARY]) == 2
+    assert outbox.stats() == {"pending": 5, "sending": 5}
+
+
+def test_claimed_notifications_are_retried_after_a_restart(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    outbox.enqueue(OWNER, {"n": 1}, "activity:1")
+    assert list(outbox.claim_due()) == [OWNER]
+    outbox.close()  # died while sending
+
+    sender = StubSender()
+    notifier = NotificationDispatcher(Outbox(str(tmp_path / "outbox.db")), {"webhook": sender}, poll_interval=0.05)
+    assert notifier.outbox.stats() == {"pending": 1}
+    notifier.start()
+    try:
+        wait_for(lambda: notifier.delivered == 1)
+    finally:
+        notifier.stop()
+    assert sender.calls == [(OWNER, [1])]
+
+
+def test_webhook_sender_classifies_http_errors():
+    aiohttp = pytest.importorskip("aiohttp")
+    from aiohttp import web
+
+    from notifications import WebhookSender
+
+    received = []
+
+    async def hook(request):
+        received.append(await request.json())
+        return web.Response(status=int(request.match_info["status"]))
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/{status}", hook)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        sender = WebhookSender(timeout=5)
+        outcomes = {}
+        try:
+            for status in (200, 404, 429, 503):
+                try:
+                    await sender.send(f"http://127.0.0.1:{port}/{status}", [{"n": status}])
+                    outcomes[status] = "sent"
+                except DeliveryError as e:
+                    outcomes[status] = "dead" if e.permanent else "retry"
+        finally:
+            await sender.close()
+            await runner.cleanup()
+        return outcomes
+
+    assert asyncio.run(scenario()) == {200: "sent", 404: "dead", 429: "retry", 503: "retry"}
+    assert received[0] == {"notifications": [{"n": 200}]}
@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from profiling import MAX_PROFILE_SECONDS, MIN_SAMPLE_INTERVAL, register_admin_routes
+
+HEADERS = {"X-Admin-Token": "secret"}
+
+
+def admin_client(tmp_path):
+    app = FastAPI()
+    register_admin_routes(app, "secret", str(tmp_path))
+    return TestClient(app)  # used as a context manager: one event loop, like the server
+
+
+def test_cpu_profile_window_and_interval_are_bounded(tmp_path):
+    with admin_client(tmp_path) as client:
+        for seconds in (0, -1, MAX_PROFILE_SECONDS + 1):
+            response = client.post(f"/admin/profile/cpu/start?seconds={seconds}", headers=HEADERS)
+            assert response.status_code == 400
+
+        response = client.post("/admin/profile/cpu/start?seconds=5&interval=0.00001", headers=HEADERS)
+        assert response.status_code == 200
+        assert response.json()["interval"] == MIN_SAMPLE_INTERVAL
+        assert client.post("/admin/profile/cpu/stop", headers=HEADERS).status_code == 200
+
+
+def test_memory_diff_only_compares_snapshots_it_took(tmp_path):
+    with admin_client(tmp_path) as client:
+        (tmp_path.parent / "outside.tracemalloc").write_bytes(b"")
+        first = client.post("/admin/memory/snapshot", headers=HEADERS).json()["name"]
+        for base in ("../outside", "mem-unknown"):
+            response = client.get(f"/admin/memory/diff?base={base}&current={first}", headers=HEADERS)
+            assert response.status_code == 404
+
+        second = client.post("/admin/memory/snapshot", headers=HEADERS).json()["name"]
+        response = client.get("/admin/memory/diff", headers=HEADERS)
+        assert response.status_code == 200
+        assert (response.json()["base"], response.json()["current"]) == (first, second)
+        client.post("/admin/memory/stop", headers=HEADERS)
@@ -0,0 +1,107 @@
+import os
+import time
+from datetime import datetime
+
+from receipt_archive import ReceiptArchive
+
+ALICE = "0x00000000000000000000000000000000000a11ce"
+BOB = "0x0000000000000000000000000000000000000b0b"
+
+
+def transactions(wallet, first_block, count=20, timestamp=None):
+    arrival = datetime.fromtimestamp(timestamp or time.time()).isoformat()
+    return [{
+        "hash": f"0x{first_block + i:064x}",
+        "blockNumber": hex(first_block + i),
+        "from": wallet,
+        "to": f"0x{first_block + i:040x}",
+        "timestamp": arrival
+    } for i in range(count)]
+
+
+def segment(archive, chain, txs):
+    archive.append(chain, txs)
+    archive.flush()
+
+
+def segment_reads(archive, monkeypatch):
+    reads = []
+    read_segment = archive._read_segment
+
+    def counting(entry):
+        reads.append(entry["file"])
+        return read_segment(entry)
+
+    monkeypatch.setattr(archive, "_read_segment", counting)
+    return reads
+
+
+def disk_bytes(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+               if name.startswith("segment-"))
+
+
+def test_queries_skip_segments_by_block_range(tmp_path, monkeypatch):
+    archive = ReceiptArchive(str(tmp_path))
+    segment(archive, "sepolia", transactions(ALICE, 100))
+    segment(archive, "sepolia", transactions(ALICE, 200))
+    segment(archive, "bnb", transactions(ALICE, 200))
+    reads = segment_reads(archive, monkeypatch)
+
+    records = archive.query(chain="sepolia", from_block=205, to_block=300)
+    assert len(records) == 15
+    assert len(reads) == 1
+
+    del reads[:]
+    assert archive.query(chain="sepolia", from_block=150, to_block=180) == []
+    assert reads == []
+
+
+def test_queries_skip_segments_by_wallet_bloom(tmp_path, monkeypatch):
+    archive = ReceiptArchive(str(tmp_path))
+    segment(archive, "sepolia", transactions(ALICE, 100))
+    segment(archive, "sepolia", transactions(BOB, 200))
+    reads = segment_reads(archive, monkeypatch)
+
+    records = archive.query(wallet=BOB.upper().replace("0X", "0x"))
+    assert {record["tx"]["from"] for record in records} == {BOB}
+    assert len(reads) == 1
+
+    del reads[:]
+    assert archive.query(wallet="0x" + "ee" * 20) == []  # not a bloom false positive for either
+    assert reads == []
+
+
+def test_hot_segment_is_queried_and_recovered(tmp_path):
+    archive = ReceiptArchive(str(tmp_path))
+    archive.append("sepolia", transactions(ALICE, 100, count=5))
+    assert len(archive.query(wallet=ALICE)) == 5
+
+    restarted = ReceiptArchive(str(tmp_path))  # journal replayed and sealed
+    assert restarted.stats()["warm_records"] == 5
+    assert len(restarted.query(wallet=ALICE, from_block=100)) == 5
+
+
+def test_retention_bounds_total_bytes(tmp_path):
+    archive = ReceiptArchive(str(tmp_path), max_total_bytes=4000)
+    for i in range(10):
+        segment(archive, "sepolia", transactions(ALICE, 100 * (i + 1), count=30))
+        assert disk_bytes(str(tmp_path)) <= 4000
+        assert archive.stats()["warm_bytes"] == disk_bytes(str(tmp_path))
+
+    # The newest segments are kept
+    remaining = archive.query(chain="sepolia")
+    assert remaining and max(int(r["tx"]["blockNumber"], 16) for r in remaining) == 1029
+    assert archive.query(chain="sepolia", to_block=199) == []
+
+
+def test_retention_drops_segments_older_than_retention_days(tmp_path):
+    archive = ReceiptArchive(str(tmp_path), retention_days=30)
+    segment(archive, "sepolia", transactions(ALICE, 100, timestamp=time.time() - 40 * 86400))
+    segment(archive, "sepolia", transactions(ALICE, 200, timestamp=time.time() - 10 * 86400))
+    segment(archive, "sepolia", transactions(BOB, 300))
+
+    assert archive.stats()["warm_segments"] == 2
+    assert len([name for name in os.listdir(tmp_path) if name.startswith("segment-")]) == 2
+    assert archive.query(to_block=199) == []
+    assert len(archive.wallet_activity(ALICE, days=30)) == 20
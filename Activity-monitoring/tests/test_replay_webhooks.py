@@ -0,0 +1,49 @@
+import json
+
+from chain_config import MONITORED_WALLET
+from replay_webhooks import diff_activities, replay
+from webhook_archive import WebhookArchive
+
+MATCHES = {3, 50, 120, 199, 250, 290}
+
+
+def delivery(count, block):
+    receipts = [{
+        "transactionHash": f"0x{block:04x}{i:060x}",
+        "blockNumber": hex(block),
+        "transactionIndex": hex(i),
+        "from": MONITORED_WALLET if i in MATCHES else f"0x{i:040x}",
+        "to": f"0x{i + 1:040x}",
+        "gasUsed": "0x5208",
+        "effectiveGasPrice": "0x3b9aca00"
+    } for i in range(count)]
+    return json.dumps({"data": [receipts]})
+
+
+def record(tmp_path):
+    archive = WebhookArchive(str(tmp_path / "archive"))
+    archive.append(delivery(300, 100), 1000.0, {"idempotency-key": "a"})
+    archive.append(delivery(300, 100), 1002.0, {"idempotency-key": "a"})  # provider redelivery
+    archive.append(delivery(10, 101), 1030.0, {"idempotency-key": "b"})
+    archive.close()
+    return str(tmp_path / "archive")
+
+
+def test_replay_matches_every_activity_of_a_large_delivery(tmp_path):
+    activities, stats = replay(record(tmp_path))
+    assert stats["deliveries"] == 3
+    assert stats["duplicates"] == 1
+    assert stats["receipts"] == 310
+    assert len(activities) == len(MATCHES) + 1  # block 101 repeats index 3
+    assert {a["blockNumber"] for a in activities} == {"0x64", "0x65"}
+
+
+def test_priority_replay_finds_the_same_activities(tmp_path):
+    path = record(tmp_path)
+    fifo, _ = replay(path)
+    priority, _ = replay(path, priority=True, batch_size=2)
+    divergence = diff_activities(fifo, priority)
+    assert not divergence["missing"] and not divergence["unexpected"]
+    # Two matches per tick still reports every match of the burst, in
+    # arrival order since they all affect the same lock
+    assert [a["hash"] for a in priority[:len(MATCHES)]] == sorted(a["hash"] for a in priority if a["blockNumber"] == "0x64")
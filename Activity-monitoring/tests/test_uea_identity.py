@@ -0,0 +1,79 @@
+from uea_identity import GET_ORIGIN_FOR_UEA_SELECTOR, UEAResolver
+
+SEPOLIA = "eip155:11155111"
+UEA = "0x" + "ab" * 20
+OWNER = "0xdB630944101765cfb1f6836AE7579Eee1cdBbCBC"
+
+
+def word(value):
+    return value.to_bytes(32, "big")
+
+
+def dynamic(data):
+    padded = data + b"\0" * (-len(data) % 32)
+    return word(len(data)) + padded
+
+
+def encode_origin(namespace, chain_id, owner, is_uea=True):
+    """ABI-encode getOriginForUEA's (UniversalAccountId, bool) return value"""
+    fields = [dynamic(namespace.encode()), dynamic(chain_id.encode()), dynamic(bytes.fromhex(owner[2:]))]
+    offsets, position = [], 3 * 32
+    for field in fields:
+        offsets.append(word(position))
+        position += len(field)
+    account = b"".join(offsets) + b"".join(fields)
+    return "0x" + (word(64) + word(int(is_uea)) + account).hex()
+
+
+class StubRpc:
+    """JSON-RPC transport answering getOriginForUEA from a dict of UEAs"""
+
+    def __init__(self, origins):
+        self.origins = origins
+        self.batches = []
+
+    def __call__(self, requests):
+        self.batches.append(requests)
+        responses = []
+        for request in requests:
+            data = request["params"][0]["data"]
+            assert data.startswith(GET_ORIGIN_FOR_UEA_SELECTOR)
+            address = "0x" + data[-40:]
+            origin = self.origins.get(address)
+            result = encode_origin(*origin) if origin else encode_origin("", "", "0x", is_uea=False)
+            responses.append({"jsonrpc": "2.0", "id": request["id"], "result": result})
+        return responses
+
+
+def test_resolving_lock_sender_maps_origin_owner_to_uea():
+    rpc = StubRpc({UEA: ("eip155", "11155111", OWNER)})
+    resolver = UEAResolver(rpc)
+    assert resolver.identity(SEPOLIA, OWNER) == OWNER.lower()
+
+    assert resolver.resolve_many([UEA]) == {UEA: ("eip155", "11155111", OWNER.lower())}
+    assert resolver.identity(SEPOLIA, OWNER) == UEA
+    # Only the origin chain maps to the UEA
+    assert resolver.identity("eip155:56", OWNER) == OWNER.lower()
+
+
+def test_cached_origins_are_not_fetched_again():
+    rpc = StubRpc({UEA: ("eip155", "11155111", OWNER)})
+    resolver = UEAResolver(rpc)
+    resolver.resolve_many([UEA, OWNER])
+    resolver.resolve_many([UEA, OWNER])
+    assert len(rpc.batches) == 1
+    assert len(rpc.batches[0]) == 2
+    assert resolver.resolve(OWNER) is None
+    assert resolver.metrics()["hits"] == 1
+
+
+def test_failed_lookup_is_not_cached():
+    def failing(requests):
+        raise OSError("connection refused")
+
+    resolver = UEAResolver(failing)
+    assert resolver.resolve_many([UEA]) == {}
+    assert resolver.identity(SEPOLIA, OWNER) == OWNER.lower()
+    resolver.transport = StubRpc({UEA: ("eip155", "11155111", OWNER)})
+    resolver.resolve_many([UEA])
+    assert resolver.identity(SEPOLIA, OWNER) == UEA
@@ -0,0 +1,47 @@
+import gzip
+import json
+import os
+
+from webhook_archive import ArchiveRecord, WebhookArchive, iter_archive, iter_deliveries, list_segments
+
+
+def test_streamed_record_round_trips(tmp_path):
+    archive = WebhookArchive(str(tmp_path))
+    body = json.dumps({"data": [[{"note": "café ✓ 🚀", "quote": "\"\\"}]]}).encode("utf-8")
+    record = archive.record(100.0, {"idempotency-key": "abc", "authorization": "secret"})
+    for i in range(0, len(body), 3):  # splits multi-byte characters across chunks
+        record.write(body[i:i + 3])
+    record.commit()
+    archive.close()
+
+    assert list(iter_deliveries(str(tmp_path))) == [(100.0, {"idempotency-key": "abc"}, body.decode("utf-8"))]
+    assert list(iter_archive(str(tmp_path))) == [(100.0, body.decode("utf-8"))]
+
+
+def test_large_body_spools_to_disk(tmp_path):
+    archive = WebhookArchive(str(tmp_path))
+    record = ArchiveRecord(archive, 1.0, spool_bytes=16)
+    record.write(b"x" * 1000)
+    assert record._spool._rolled
+    record.commit()
+    archive.close()
+    assert [body for _, _, body in iter_deliveries(str(tmp_path))] == ["x" * 1000]
+
+
+def test_aborted_record_is_not_archived(tmp_path):
+    archive = WebhookArchive(str(tmp_path))
+    record = archive.record(1.0)
+    record.write(b'{"data": [')
+    record.abort()
+    archive.append(b'{"data": []}', 2.0)
+    archive.close()
+    assert [received_at for received_at, _ in iter_archive(str(tmp_path))] == [2.0]
+    assert [name for name in os.listdir(tmp_path) if not name.endswith(".jsonl.gz")] == []
+
+
+def test_records_without_headers_still_load(tmp_path):
+    path = tmp_path / "webhooks-20240101T000000-1-0001.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"received_at": 5.0, "body": "{}"}) + "\n")
+    assert list_segments(str(tmp_path)) == [str(path)]
+    assert list(iter_deliveries(str(tmp_path))) == [(5.0, {}, "{}")]
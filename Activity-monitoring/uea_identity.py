@@ -0,0 +1,227 @@
+"""
+Universal Executor Account origin resolution
+Maps an address to (chainNamespace, chainId, owner) through the Push Chain
+IUEAFactory.getOriginForUEA call that DeadManSwitch.sol uses, so activity
+seen on sepolia / bnb / optimism can be linked back to the lock owner.
+
+Callers resolve the UEAs that own the monitored locks; addresses seen in
+origin-chain traffic are never UEAs themselves, but once a UEA is resolved
+identity() maps its origin owner back to it.
+
+Results sit in a bounded LRU cache with a TTL (shorter for non-UEA
+addresses), cache misses are resolved with one JSON-RPC batch request, and
+the cache is persisted across restarts.
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+
+UEA_FACTORY_ADDRESS = "0x00000000000000000000000000000000000000eA"
+# bytes4(keccak256("getOriginForUEA(address)"))
+GET_ORIGIN_FOR_UEA_SELECTOR = "0xd0f4b097"
+
+
+class HttpJsonRpcTransport:
+    """Send a JSON-RPC batch over HTTP; any callable with this signature works"""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, requests):
+        body = json.dumps(requests).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+
+def encode_get_origin_call(address):
+    return GET_ORIGIN_FOR_UEA_SELECTOR + address.lower().replace("0x", "").rjust(64, "0")
+
+
+def decode_get_origin_result(result):
+    """
+    Decode (UniversalAccountId account, bool isUEA)
+    Returns (chainNamespace, chainId, owner hex) or None for non-UEA addresses
+    """
+    data = bytes.fromhex(result[2:] if result.startswith("0x") else result)
+
+    def word(offset):
+        return int.from_bytes(data[offset:offset + 32], "big")
+
+    def dynamic_bytes(offset):
+        length = word(offset)
+        return data[offset + 32:offset + 32 + length]
+
+    tuple_offset = word(0)
+    is_uea = bool(word(32))
+    if not is_uea:
+        return None
+    namespace = dynamic_bytes(tuple_offset + word(tuple_offset)).decode("utf-8")
+    chain_id = dynamic_bytes(tuple_offset + word(tuple_offset + 32)).decode("utf-8")
+    owner = "0x" + dynamic_bytes(tuple_offset + word(tuple_offset + 64)).hex()
+    return namespace, chain_id, owner
+
+
+class UEAResolver:
+    """
+    Cached address -> UEA origin resolution
+
+    resolve_many() answers from the cache and fetches every miss with one
+    JSON-RPC batch. A None origin (non-UEA address) is cached too, for
+    negative_ttl seconds. Addresses whose lookup failed are not cached.
+    """
+
+    def __init__(self, transport, cache_file=None, max_entries=50000, ttl=24 * 3600,
+                 negative_ttl=3600, factory=UEA_FACTORY_ADDRESS):
+        self.transport = transport
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.factory = factory
+        self._cache = OrderedDict()  # address -> (origin or None, expires_at)
+        self._owners = {}  # (caip2, owner) -> UEA address
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.rpc_batches = 0
+        self.rpc_errors = 0
+        self._last_saved = time.monotonic()
+        self.load()
+
+    # ---- lookups ----
+
+    def resolve(self, address):
+        return self.resolve_many([address]).get(address.lower())
+
+    def resolve_many(self, addresses):
+        """Return {lowercase address: origin or None} for every address"""
+        now = time.time()
+        results = {}
+        missing = []
+        with self._lock:
+            for address in {address.lower() for address in addresses if address}:
+                entry = self._cache.get(address)
+                if entry is not None and entry[1] > now:
+                    self._cache.move_to_end(address)
+                    results[address] = entry[0]
+                    if entry[0] is None:
+                        self.negative_hits += 1
+                    else:
+                        self.hits += 1
+                else:
+                    self.misses += 1
+                    missing.append(address)
+
+        if missing:
+            fetched = self._fetch(missing)
+            with self._lock:
+                for address, origin in fetched.items():
+                    self._store(address, origin, now)
+                    results[address] = origin
+        return results
+
+    def identity(self, chain_caip2, address):
+        """
+        Owner identity for an address seen on a chain
+        The UEA address when the address is a UEA or the known origin owner of
+        one, otherwise the address itself
+        """
+        address = address.lower()
+        with self._lock:
+            return self._owners.get((chain_caip2, address), address)
+
+    def _fetch(self, addresses):
+        requests = [{
+            "jsonrpc": "2.0",
+            "id": i,
+            "method": "eth_call",
+            "params": [{"to": self.factory, "data": encode_get_origin_call(address)}, "latest"]
+        } for i, address in enumerate(addresses)]
+        self.rpc_batches += 1
+        try:
+            responses = self.transport(requests)
+        except Exception as e:
+            self.rpc_errors += 1
+            print(f"⚠️ UEA lookup failed for {len(addresses)} addresses: {e}")
+            return {}
+        if isinstance(responses, dict):
+            responses = [responses]
+
+        fetched = {}
+        for response in responses:
+            index = response.get("id")
+            if not isinstance(index, int) or not 0 <= index < len(addresses):
+                continue
+            if "error" in response or not response.get("result"):
+                self.rpc_errors += 1
+                continue
+            try:
+                fetched[addresses[index]] = decode_get_origin_result(response["result"])
+            except (ValueError, IndexError, UnicodeDecodeError):
+                self.rpc_errors += 1
+        return fetched
+
+    def _store(self, address, origin, now):
+        ttl = self.ttl if origin is not None else self.negative_ttl
+        self._cache[address] = (origin, now + ttl)
+        self._cache.move_to_end(address)
+        if origin is not None:
+            namespace, chain_id, owner = origin
+            self._owners[(f"{namespace}:{chain_id}", owner.lower())] = address
+        while len(self._cache) > self.max_entries:
+            evicted, (evicted_origin, _) = self._cache.popitem(last=False)
+            if evicted_origin is not None:
+                namespace, chain_id, owner = evicted_origin
+                self._owners.pop((f"{namespace}:{chain_id}", owner.lower()), None)
+
+    # ---- metrics and persistence ----
+
+    def metrics(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+            "rpc_batches": self.rpc_batches,
+            "rpc_errors": self.rpc_errors
+        }
+
+    def load(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable UEA cache {self.cache_file}: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for address, origin, expires_at in saved:
+                if expires_at > now:
+                    self._store(address, tuple(origin) if origin else None, now)
+                    self._cache[address] = (self._cache[address][0], expires_at)
+
+    def save(self):
+        if not self.cache_file:
+            return
+        with self._lock:
+            entries = [[address, origin, expires_at] for address, (origin, expires_at) in self._cache.items()]
+        tmp_path = self.cache_file + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.cache_file)
+        self._last_saved = time.monotonic()
+
+    def save_if_due(self, interval=300):
+        if time.monotonic() - self._last_saved >= interval:
+            self.save()
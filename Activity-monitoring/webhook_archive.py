@@ -0,0 +1,190 @@
+"""
+Recorded-webhook archive
+Stores raw /webhook request bodies with their arrival time and delivery
+headers in rotating gzip-compressed JSON-lines segments so production traffic
+can be replayed later with replay_webhooks.py
+
+A body is recorded while it streams in: each chunk is JSON-escaped into a
+spool file right away, and the finished record is copied into the shared
+segment in one piece, so concurrent deliveries never interleave and no body
+is held in memory.
+"""
+
+import codecs
+import gzip
+import heapq
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Only these headers are archived: they identify a delivery for deduplication.
+# Bodies are stored decompressed, so Content-Encoding is deliberately left out.
+ARCHIVED_HEADERS = ("idempotency-key", "x-delivery-id", "stream-id", "batch-start-range", "batch-end-range")
+
+SEGMENT_PREFIX = "webhooks-"
+SEGMENT_SUFFIX = ".jsonl.gz"
+
+
+class WebhookArchive:
+    """
+    Append-only archive of raw webhook bodies
+
+    A new segment is started once the current one holds max_segment_bytes of
+    uncompressed data or is older than max_segment_age seconds. Only the newest
+    max_segments segments are kept on disk.
+    """
+
+    def __init__(self, directory, max_segment_bytes=64 * 1024 * 1024,
+                 max_segment_age=3600, max_segments=48):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment_bytes = 0
+        self._segment_started = 0.0
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, received_at=None, headers=None):
+        """Start recording a body that arrives in chunks"""
+        return ArchiveRecord(self, received_at, headers)
+
+    def append(self, body, received_at=None, headers=None):
+        """Record one complete raw request body (bytes or str)"""
+        record = self.record(received_at, headers)
+        record.write(body.encode("utf-8") if isinstance(body, str) else body)
+        record.commit()
+
+    def _append_spool(self, spool, size, received_at):
+        with self._lock:
+            if self._should_rotate(received_at):
+                self._rotate(received_at)
+            shutil.copyfileobj(spool, self._file, 1024 * 1024)
+            # Sync-flush so a crash only loses the record being written
+            self._file.flush()
+            self._segment_bytes += size
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _should_rotate(self, now):
+        if self._file is None:
+            return True
+        if self._segment_bytes >= self.max_segment_bytes:
+            return True
+        return now - self._segment_started >= self.max_segment_age
+
+    def _rotate(self, now):
+        if self._file is not None:
+            self._file.close()
+        self._sequence += 1
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now))
+        name = f"{SEGMENT_PREFIX}{stamp}-{os.getpid()}-{self._sequence:04d}{SEGMENT_SUFFIX}"
+        self._file = gzip.open(os.path.join(self.directory, name), "ab")
+        self._segment_bytes = 0
+        self._segment_started = now
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        segments = list_segments(self.directory)
+        for path in segments[:-self.max_segments] if self.max_segments else []:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class ArchiveRecord:
+    """
+    One archive line being written as its body streams in
+    write() takes raw body chunks; commit() appends the finished line to the
+    archive, abort() discards it. Spools up to spool_bytes in memory, the
+    rest in a temporary file in the archive directory.
+    """
+
+    def __init__(self, archive, received_at=None, headers=None, spool_bytes=1024 * 1024):
+        self.archive = archive
+        self.received_at = time.time() if received_at is None else received_at
+        headers = {name: headers.get(name) for name in ARCHIVED_HEADERS if headers and headers.get(name)}
+        self._text = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._spool = tempfile.SpooledTemporaryFile(max_size=spool_bytes, dir=archive.directory)
+        self._size = 0
+        # Everything up to the opening quote of the body string
+        self._write(json.dumps({"received_at": self.received_at, "headers": headers})[:-1] + ', "body": "')
+
+    def _write(self, text):
+        data = text.encode("utf-8")
+        self._spool.write(data)
+        self._size += len(data)
+
+    def write(self, chunk):
+        text = self._text.decode(chunk)
+        if text:
+            self._write(json.dumps(text)[1:-1])
+
+    def commit(self):
+        tail = self._text.decode(b"", final=True)
+        if tail:
+            self._write(json.dumps(tail)[1:-1])
+        self._write('"}\n')
+        try:
+            self._spool.seek(0)
+            self.archive._append_spool(self._spool, self._size, self.received_at)
+        finally:
+            self._spool.close()
+
+    def abort(self):
+        self._spool.close()
+
+
+def list_segments(directory):
+    """Archive segment paths, oldest first"""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+    )
+    return [os.path.join(directory, name) for name in names]
+
+
+def iter_archive(path):
+    """
+    Yield (received_at, body) records from an archive directory or a single
+    segment file, in arrival order
+    """
+    for received_at, _, body in iter_deliveries(path):
+        yield received_at, body
+
+
+def iter_deliveries(path):
+    """
+    Yield (received_at, headers, body) records in arrival order
+    Records written before headers were archived have empty headers
+    """
+    segments = list_segments(path) if os.path.isdir(path) else [path]
+    # Each segment is in arrival order; segments from concurrent writers may
+    # interleave, so merge them lazily instead of loading everything
+    streams = [_read_segment(segment) for segment in segments]
+    yield from heapq.merge(*streams, key=lambda record: record[0])
+
+
+def _read_segment(path):
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    return  # truncated tail of a segment that was being written
+                yield record["received_at"], record.get("headers") or {}, record["body"]
+    except (EOFError, OSError):
+        return  # segment still open or cut short by a crash
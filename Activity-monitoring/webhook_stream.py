@@ -0,0 +1,188 @@
+"""
+Streaming webhook body parsing
+Decodes an optionally gzip/deflate-compressed request body chunk by chunk and
+incrementally extracts the receipts of a QuickNode receipt stream payload
+({"data": [[receipt, ...], ...]}). Only the receipt currently being read is
+buffered, so memory stays flat regardless of batch size and receipts reach
+the extraction stage before the whole body has arrived.
+"""
+
+import codecs
+import json
+import re
+import zlib
+
+# Characters that matter outside / inside JSON strings
+_STRUCTURAL = re.compile(r'["{}\[\]:]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_CLOSING = {"}": "{", "]": "["}
+_decoder = json.JSONDecoder()
+
+
+class ReceiptStreamParser:
+    """
+    Incremental extractor for receipts nested in the top-level "data" array
+
+    feed() returns the receipts completed by a chunk; close() checks the body
+    ended with a complete JSON document. Values outside data[*][*] are skipped
+    without being materialized. A receipt that lies entirely inside one chunk
+    is decoded directly by the C JSON decoder; only receipts split across
+    chunks are scanned and buffered character by character.
+    """
+
+    def __init__(self, max_receipt_bytes=4 * 1024 * 1024):
+        self.max_receipt_bytes = max_receipt_bytes
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._key = None
+        self._last_string = None
+        self._current_key = None
+        self._in_data = False
+        self._capture = None
+        self._capture_size = 0
+        self._done = False
+
+    def feed(self, chunk):
+        text = self._text.decode(chunk)
+        receipts = []
+        stack = self._stack
+        n = len(text)
+        i = 0
+        start = 0 if self._capture is not None else None
+
+        while i < n:
+            if self._in_string:
+                if self._escape:
+                    if self._key is not None:
+                        self._key.append(text[i])
+                    self._escape = False
+                    i += 1
+                    continue
+                m = _STRING_SPECIAL.search(text, i)
+                j = m.start() if m else n
+                if self._key is not None:
+                    self._key.append(text[i:j])
+                if m is None:
+                    break
+                if text[j] == '"':
+                    self._in_string = False
+                    if self._key is not None:
+                        self._last_string = "".join(self._key)
+                        self._key = None
+                else:
+                    if self._key is not None:
+                        self._key.append("\\")
+                    self._escape = True
+                i = j + 1
+                continue
+
+            m = _STRUCTURAL.search(text, i)
+            if m is None:
+                break
+            j = m.start()
+            c = text[j]
+            if self._done:
+                raise ValueError("unexpected data after end of JSON document")
+
+            if c == '"':
+                self._in_string = True
+                if len(stack) == 1:
+                    self._key = []
+            elif c == "{" or c == "[":
+                if not stack and c != "{":
+                    raise ValueError("webhook body must be a JSON object")
+                if len(stack) == 1 and c == "[" and self._current_key == "data":
+                    self._in_data = True
+                if c == "{" and self._in_data and len(stack) == 3 and stack[2] == "[":
+                    # Fast path: the whole receipt is in this chunk
+                    try:
+                        receipt, end = _decoder.raw_decode(text, j)
+                    except ValueError:
+                        receipt = None
+                    if receipt is not None:
+                        receipts.append(receipt)
+                        i = end
+                        continue
+                    self._capture = []
+                    self._capture_size = 0
+                    start = j
+                stack.append(c)
+            elif c == "}" or c == "]":
+                if not stack or stack[-1] != _CLOSING[c]:
+                    raise ValueError("mismatched brackets in webhook body")
+                if self._capture is not None and len(stack) == 4:
+                    self._capture.append(text[start:j + 1])
+                    receipts.append(json.loads("".join(self._capture)))
+                    self._capture = None
+                    start = None
+                stack.pop()
+                if len(stack) == 1:
+                    self._in_data = False
+                elif not stack:
+                    self._done = True
+            elif c == ":" and len(stack) == 1:
+                self._current_key = self._last_string
+            i = j + 1
+
+        if self._capture is not None:
+            self._capture.append(text[start:])
+            self._capture_size += n - start
+            if self._capture_size > self.max_receipt_bytes:
+                raise ValueError("receipt exceeds max_receipt_bytes")
+        return receipts
+
+    def close(self):
+        self._text.decode(b"", final=True)
+        if not self._done or self._in_string:
+            raise ValueError("incomplete webhook body")
+
+
+def content_decoder(encoding):
+    """Return a zlib decompressor for a Content-Encoding, or None for identity"""
+    encoding = (encoding or "identity").strip().lower()
+    if encoding in ("", "identity"):
+        return None
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return zlib.decompressobj()
+    raise ValueError(f"unsupported Content-Encoding: {encoding}")
+
+
+async def decoded_chunks(chunks, encoding, max_chunk=256 * 1024):
+    """Decompress an async iterator of body chunks on the fly"""
+    decoder = content_decoder(encoding)
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        if decoder is None:
+            yield chunk
+            continue
+        data = decoder.decompress(chunk, max_chunk)
+        while data:
+            yield data
+            # Bound each output chunk so a compression bomb cannot balloon memory
+            data = decoder.decompress(decoder.unconsumed_tail, max_chunk) if decoder.unconsumed_tail else b""
+    if decoder is not None:
+        tail = decoder.flush()
+        if tail:
+            yield tail
+        if not decoder.eof:
+            raise ValueError("truncated compressed webhook body")
+
+
+async def iter_webhook_receipts(chunks, encoding=None, on_data=None):
+    """
+    Yield receipts from a (possibly compressed) streamed webhook body
+    on_data, if given, is called with every decompressed chunk (e.g. to
+    archive the raw body)
+    """
+    parser = ReceiptStreamParser()
+    async for data in decoded_chunks(chunks, encoding):
+        if on_data is not None:
+            on_data(data)
+        for receipt in parser.feed(data):
+            yield receipt
+    parser.close()